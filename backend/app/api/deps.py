@@ -1,10 +1,13 @@
+from typing import Any, Dict, Tuple
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..core.database import get_session
-from ..core.security import decode_access_token
+from ..core.database import engine, get_read_session, get_session, read_engine
 from ..models.user import User
+from ..services.cache import wrote_recently
+from ..services.principals import decode_token_claims, get_principal
 from ..services.users import get_user
 
 
@@ -25,31 +28,51 @@ async def get_existing_user(
     return user
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_db_session)
-) -> User:
+def _credentials_error(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def authenticate_token(session: AsyncSession, token: str) -> Tuple[User, Dict[str, Any]]:
+    """Return the user a bearer token belongs to together with the token's claims."""
+
     try:
-        payload = decode_access_token(token)
+        payload = decode_token_claims(token)
     except ValueError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        ) from exc
+        raise _credentials_error("Could not validate credentials") from exc
 
     subject = payload.get("sub")
     if subject is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token payload",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _credentials_error("Invalid token payload")
 
-    user = await get_user(session, int(subject))
+    user = await get_principal(session, int(subject))
     if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _credentials_error("User not found")
+    return user, payload
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_db_session)
+) -> User:
+    user, _ = await authenticate_token(session, token)
     return user
+
+
+async def get_read_db_session(
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db_session),
+) -> AsyncSession:
+    """A session for endpoints that only read, on the read replica when one is configured.
+
+    Users who wrote within ``READ_YOUR_WRITES_SECONDS`` read from the primary
+    instead, so a change they just made (a manual sync, say) shows up at once.
+    """
+
+    if read_engine is engine or await wrote_recently(current_user.id):
+        yield session
+        return
+    async for read_session in get_read_session():
+        yield read_session
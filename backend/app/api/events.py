@@ -0,0 +1,58 @@
+from typing import AsyncIterator, Optional
+
+import asyncio
+import time
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import get_settings
+from ..services.events import get_event_bus
+from .deps import authenticate_token, get_db_session
+
+router = APIRouter(tags=["events"])
+
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
+
+
+async def _event_stream(user_id: int, expires_at: Optional[float]) -> AsyncIterator[bytes]:
+    keepalive = get_settings().events_keepalive_seconds
+    async with get_event_bus().subscribe(user_id) as queue:
+        # Sent right away so proxies and the browser see the stream open.
+        yield b": connected\n\n"
+        while True:
+            timeout = keepalive
+            if expires_at is not None:
+                timeout = min(timeout, expires_at - time.time())
+                if timeout <= 0:
+                    # The browser reconnects and is authenticated again.
+                    return
+            try:
+                event, data = await asyncio.wait_for(queue.get(), timeout)
+            except TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            yield b"event: " + event.encode() + b"\ndata: " + data + b"\n\n"
+
+
+@router.get("/events")
+async def stream_events(
+    access_token: Optional[str] = Query(None),
+    bearer_token: Optional[str] = Depends(optional_oauth2_scheme),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """Push the user's notifications, sync job progress and metric updates as Server-Sent Events.
+
+    ``EventSource`` cannot send headers, so the token may be given as
+    ``access_token`` instead. The user is read once; an idle stream only sends
+    keepalive comments and ends when the token expires.
+    """
+
+    user, claims = await authenticate_token(session, bearer_token or access_token or "")
+    return StreamingResponse(
+        _event_stream(user.id, claims.get("exp")),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,6 +1,8 @@
 from datetime import datetime, timedelta, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -12,7 +14,14 @@ from ..schemas.integration import (
     FacebookIntegrationUpdate,
     IntegrationRead,
 )
-from .deps import get_current_user, get_db_session
+from ..services.cache import INTEGRATIONS_SCOPE, bump_data_version
+from ..services.events import metrics_updated
+from ..services.freshness import reset_sync_state
+from ..services.metrics import remove_integration_metrics
+from ..services.resilience import get_circuit_breaker
+from ..services.tokens import get_token_manager
+from .deps import get_current_user, get_db_session, get_read_db_session
+from .etag import etag_matches, make_etag, not_modified, set_etag
 
 router = APIRouter(prefix="/integrations", tags=["integrations"])
 
@@ -42,6 +51,7 @@ async def connect_facebook(
     )
     session.add(integration)
     await session.commit()
+    await bump_data_version(INTEGRATIONS_SCOPE, [current_user.id])
     await session.refresh(integration)
     return integration
 
@@ -78,19 +88,38 @@ async def connect_adsense(
     )
     session.add(integration)
     await session.commit()
+    await bump_data_version(INTEGRATIONS_SCOPE, [current_user.id])
     await session.refresh(integration)
     return integration
 
 
 @router.get("", response_model=list[IntegrationRead])
 async def list_integrations(
-    session: AsyncSession = Depends(get_db_session),
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_db_session),
     current_user=Depends(get_current_user),
 ):
     result = await session.execute(
-        select(IntegrationAccount).where(IntegrationAccount.user_id == current_user.id)
+        select(IntegrationAccount)
+        .where(IntegrationAccount.user_id == current_user.id)
+        .order_by(IntegrationAccount.id)
+    )
+    integrations = result.scalars().all()
+    # Tagged from the rows themselves: refreshed tokens are also written by the
+    # sync, possibly in another process, and a user has only a few integrations.
+    etag = make_etag(
+        INTEGRATIONS_SCOPE,
+        current_user.id,
+        *(
+            (integration.id, json.dumps(integration.credentials, sort_keys=True, default=str))
+            for integration in integrations
+        ),
     )
-    return result.scalars().all()
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return integrations
 
 
 @router.put("/facebook/{integration_id}", response_model=IntegrationRead)
@@ -123,8 +152,12 @@ async def update_facebook(
     if "api_version" in data and data["api_version"]:
         existing_credentials["api_version"] = data["api_version"]
 
+    if existing_credentials["account_id"] != integration.credentials["account_id"]:
+        await reset_sync_state(session, integration.id)
     integration.credentials = existing_credentials
     await session.commit()
+    get_circuit_breaker().reset(integration.id)
+    await bump_data_version(INTEGRATIONS_SCOPE, [current_user.id])
     await session.refresh(integration)
     return integration
 
@@ -168,8 +201,13 @@ async def update_adsense(
             expiry = expiry.replace(tzinfo=timezone.utc)
         credentials["token_expiry"] = expiry.astimezone(timezone.utc).isoformat()
 
+    if credentials["account_id"] != integration.credentials["account_id"]:
+        await reset_sync_state(session, integration.id)
     integration.credentials = credentials
     await session.commit()
+    get_token_manager().forget(integration.id)
+    get_circuit_breaker().reset(integration.id)
+    await bump_data_version(INTEGRATIONS_SCOPE, [current_user.id])
     await session.refresh(integration)
     return integration
 
@@ -181,5 +219,10 @@ async def delete_integration(
     current_user=Depends(get_current_user),
 ):
     integration = await _get_integration_for_user(session, current_user.id, integration_id)
+    await remove_integration_metrics(session, integration)
     await session.delete(integration)
     await session.commit()
+    await metrics_updated([current_user.id])
+    get_token_manager().forget(integration_id)
+    get_circuit_breaker().reset(integration_id)
+    await bump_data_version(INTEGRATIONS_SCOPE, [current_user.id])
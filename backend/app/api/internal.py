@@ -0,0 +1,39 @@
+from typing import Optional
+
+import hmac
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+
+from ..core.config import get_settings
+from ..core.instrumentation import render_metrics
+
+router = APIRouter(tags=["internal"])
+
+
+def require_internal_token(authorization: Optional[str] = Header(None)) -> None:
+    """Admit only requests bearing ``INTERNAL_METRICS_TOKEN``; without it the route is off."""
+
+    token = get_settings().internal_metrics_token
+    if not token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    scheme, _, credentials = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        credentials.encode("utf-8"), token.encode("utf-8")
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid internal metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+# Not under /metrics, which serves the dashboard's own metrics. Plain ``def`` so
+# reading the multiprocess files happens in the threadpool.
+@router.get(
+    "/metrics-internal",
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_token)],
+)
+def internal_metrics() -> Response:
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -1,50 +1,261 @@
 from datetime import date
+from typing import Any, Dict, List, Optional, Union
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..schemas.metrics import MetricsResponse
-from ..services.metrics import list_metrics, sync_daily_metrics
-from .deps import get_current_user, get_db_session
+from ..core.config import get_settings
+from ..core.serialization import dumps
+from ..models.metrics import MetricGranularity
+from ..models.scheduling import SyncJob, SyncJobStatus
+from ..schemas.metrics import (
+    MetricsColumnarResponse,
+    MetricsFormat,
+    MetricsResponse,
+    MetricsSummary,
+    SyncJobRead,
+)
+from ..services.cache import METRICS_SCOPE, get_cache, metrics_cache_key
+from ..services.exports import ExportFormat, export_metrics
+from ..services.metrics import (
+    IntegrationSyncError,
+    backfill_metrics,
+    get_daily_metrics,
+    list_metrics,
+    metrics_stamp,
+)
+from ..services.sync_jobs import enqueue_sync_job, get_sync_job, run_sync_job
+from .deps import get_current_user, get_db_session, get_read_db_session
+from .etag import etag_matches, make_etag, not_modified, set_etag
 
 router = APIRouter(prefix="/metrics", tags=["metrics"])
 
 
-@router.post("/sync")
+def _sync_failed(error: IntegrationSyncError) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(error))
+
+
+async def _render_sync_job(session: AsyncSession, job: SyncJob) -> SyncJobRead:
+    read = SyncJobRead.from_orm(job)
+    if job.status in (SyncJobStatus.SUCCEEDED, SyncJobStatus.PARTIAL):
+        metrics = await get_daily_metrics(session, job.user_id, job.start_date, job.end_date)
+        read.metrics = [
+            MetricsSummary(
+                metric_date=metric.metric_date,
+                spend=metric.spend,
+                revenue=metric.revenue,
+                roi=metric.roi,
+            )
+            for metric in metrics
+        ]
+    return read
+
+
+@router.post("/sync", status_code=status.HTTP_202_ACCEPTED, response_model=SyncJobRead)
 async def sync_metrics(
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
     metric_date: date = Query(..., alias="date"),
+    integration_ids: Optional[List[int]] = Query(None, alias="integration_id"),
+    force: bool = False,
     session: AsyncSession = Depends(get_db_session),
     current_user=Depends(get_current_user),
 ):
-    metric = await sync_daily_metrics(session, current_user.id, metric_date)
-    return {
-        "id": metric.id,
-        "metric_date": metric.metric_date,
-        "spend": metric.spend,
-        "revenue": metric.revenue,
-        "roi": metric.roi,
-    }
+    job, created = await enqueue_sync_job(
+        session, current_user.id, metric_date, metric_date, integration_ids, force
+    )
+    if created and get_settings().sync_jobs_inline:
+        background_tasks.add_task(run_sync_job, job.id)
+    response.headers["Location"] = str(request.url_for("get_sync_job_status", job_id=job.id))
+    return await _render_sync_job(session, job)
 
 
-@router.get("", response_model=MetricsResponse)
-async def get_metrics(
+@router.get("/sync/{job_id}", response_model=SyncJobRead)
+async def get_sync_job_status(
+    job_id: int,
+    session: AsyncSession = Depends(get_db_session),
+    current_user=Depends(get_current_user),
+):
+    job = await get_sync_job(session, current_user.id, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sync job not found")
+    return await _render_sync_job(session, job)
+
+
+@router.post("/backfill")
+async def backfill(
+    start: date,
+    end: date,
+    integration_ids: Optional[List[int]] = Query(None, alias="integration_id"),
+    force: bool = False,
+    session: AsyncSession = Depends(get_db_session),
+    current_user=Depends(get_current_user),
+):
+    if end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end must not be before start",
+        )
+    max_days = get_settings().backfill_max_days
+    if (end - start).days + 1 > max_days:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Backfill range is limited to {max_days} days",
+        )
+
+    try:
+        metrics = await backfill_metrics(
+            session, current_user.id, start, end, integration_ids, force
+        )
+    except IntegrationSyncError as error:
+        raise _sync_failed(error) from error
+    return [
+        {
+            "id": metric.id,
+            "metric_date": metric.metric_date,
+            "spend": metric.spend,
+            "revenue": metric.revenue,
+            "roi": metric.roi,
+        }
+        for metric in metrics
+    ]
+
+
+_EXPORT_MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+
+@router.get("/export")
+async def export(
     start_date: date,
     end_date: date,
-    session: AsyncSession = Depends(get_db_session),
+    export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+    gzip: bool = False,
+    breakdown: bool = False,
     current_user=Depends(get_current_user),
 ):
-    data = await list_metrics(session, current_user.id, start_date, end_date)
-    return {
-        "metrics": [
-            {
-                "metric_date": metric.metric_date,
-                "spend": metric.spend,
-                "revenue": metric.revenue,
-                "roi": metric.roi,
-            }
-            for metric in data["metrics"]
-        ],
+    filename = f"metrics_{start_date.isoformat()}_{end_date.isoformat()}.{export_format.value}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(
+        export_metrics(
+            current_user.id,
+            start_date,
+            end_date,
+            export_format,
+            compress=gzip,
+            breakdown=breakdown,
+        ),
+        media_type=_EXPORT_MEDIA_TYPES[export_format],
+        headers=headers,
+    )
+
+
+def _render_metrics(data: Dict[str, Any], response_format: MetricsFormat) -> bytes:
+    totals = {
         "total_spend": data["total_spend"],
         "total_revenue": data["total_revenue"],
         "average_roi": data["average_roi"],
+        "weighted_roi": data["weighted_roi"],
     }
+    metrics = data["metrics"]
+
+    if get_settings().metrics_fast_serialization:
+        # The values come straight from typed columns, so Pydantic validation is skipped.
+        if response_format == MetricsFormat.COLUMNAR:
+            payload: Dict[str, Any] = {
+                "dates": [metric.metric_date for metric in metrics],
+                "spend": [metric.spend for metric in metrics],
+                "revenue": [metric.revenue for metric in metrics],
+                "roi": [metric.roi for metric in metrics],
+            }
+        else:
+            payload = {
+                "metrics": [
+                    {
+                        "metric_date": metric.metric_date,
+                        "spend": metric.spend,
+                        "revenue": metric.revenue,
+                        "roi": metric.roi,
+                    }
+                    for metric in metrics
+                ]
+            }
+        return dumps({**payload, **totals})
+
+    if response_format == MetricsFormat.COLUMNAR:
+        model: BaseModel = MetricsColumnarResponse(
+            dates=[metric.metric_date for metric in metrics],
+            spend=[metric.spend for metric in metrics],
+            revenue=[metric.revenue for metric in metrics],
+            roi=[metric.roi for metric in metrics],
+            **totals,
+        )
+    else:
+        model = MetricsResponse(
+            metrics=[
+                MetricsSummary(
+                    metric_date=metric.metric_date,
+                    spend=metric.spend,
+                    revenue=metric.revenue,
+                    roi=metric.roi,
+                )
+                for metric in metrics
+            ],
+            **totals,
+        )
+    return model.json().encode("utf-8")
+
+
+@router.get("", response_model=Union[MetricsResponse, MetricsColumnarResponse])
+async def get_metrics(
+    request: Request,
+    start_date: date,
+    end_date: date,
+    granularity: MetricGranularity = MetricGranularity.DAY,
+    response_format: MetricsFormat = Query(MetricsFormat.ROWS, alias="format"),
+    session: AsyncSession = Depends(get_read_db_session),
+    current_user=Depends(get_current_user),
+):
+    cache = get_cache()
+    # The stamp comes from the database: the nightly sync and sync jobs may write
+    # in other processes, whose version bumps an in-memory cache never sees. The
+    # ETag is built from it alone so every worker, before and after a restart,
+    # hands out the same one for the same data.
+    stamp = await metrics_stamp(session, current_user.id, start_date, end_date, granularity)
+    parts = (
+        *stamp,
+        start_date.isoformat(),
+        end_date.isoformat(),
+        granularity.value,
+        response_format.value,
+    )
+    etag = make_etag(METRICS_SCOPE, current_user.id, *parts)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    cache_key = await metrics_cache_key(current_user.id, *parts)
+    body = await cache.get(cache_key)
+    if body is None:
+        data = await list_metrics(session, current_user.id, start_date, end_date, granularity)
+        body = _render_metrics(data, response_format)
+        await cache.set(cache_key, body, get_settings().metrics_cache_ttl_seconds)
+    response = Response(content=body, media_type="application/json")
+    set_etag(response, etag)
+    return response
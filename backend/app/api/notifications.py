@@ -1,23 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models.notification import SyncNotification
 from ..schemas.notification import NotificationRead
-from .deps import get_current_user, get_db_session
+from ..services.cache import record_user_writes
+from .deps import get_current_user, get_db_session, get_read_db_session
+from .etag import etag_matches, make_etag, not_modified, set_etag
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
 
 @router.get("", response_model=list[NotificationRead])
 async def list_notifications(
-    session: AsyncSession = Depends(get_db_session),
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_db_session),
     current_user=Depends(get_current_user),
 ):
-    query = select(SyncNotification).where(
+    unread = (
         SyncNotification.user_id == current_user.id,
         SyncNotification.is_read.is_(False),
-    ).order_by(SyncNotification.created_at.desc())
+    )
+    # Notifications are also written by the background sync, so the stamp is read
+    # from the table itself: any insert or read-marking changes the unread id set.
+    stamp = await session.execute(
+        select(
+            func.count(SyncNotification.id),
+            func.max(SyncNotification.id),
+            func.sum(SyncNotification.id),
+        ).where(*unread)
+    )
+    etag = make_etag("notifications", current_user.id, *stamp.one())
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    query = select(SyncNotification).where(*unread).order_by(SyncNotification.created_at.desc())
     result = await session.execute(query)
     return result.scalars().all()
 
@@ -34,3 +53,4 @@ async def mark_notification_read(
 
     notification.is_read = True
     await session.commit()
+    await record_user_writes([current_user.id])
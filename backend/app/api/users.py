@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..core.passwords import hash_password
 from ..models.user import User
 from ..schemas.user import UserCreate, UserRead
 from .deps import get_current_user, get_db_session
@@ -15,8 +16,9 @@ async def create_user(payload: UserCreate, session: AsyncSession = Depends(get_d
     if result.scalar_one_or_none():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
-    user = User(email=payload.email, name=payload.name)
-    user.set_password(payload.password)
+    user = User(
+        email=payload.email, name=payload.name, password_hash=await hash_password(payload.password)
+    )
     session.add(user)
     await session.commit()
     await session.refresh(user)
@@ -0,0 +1,40 @@
+import logging
+
+from sqlalchemy import delete, func, inspect, select
+from sqlalchemy.engine import Connection
+
+from .core.database import AsyncSessionLocal, create_missing_indexes, engine
+from .models.base import Base
+from .models.metrics import DailyMetric
+from .services.rollups import rebuild_rollups_if_empty
+
+logger = logging.getLogger(__name__)
+
+
+def remove_duplicate_daily_metrics(connection: Connection) -> None:
+    """Keep only the newest row per user and day before ``uq_daily_metrics_user_date`` exists.
+
+    Databases from before the index accumulated one row per sync of a day, and
+    the unique index cannot be created over them.
+    """
+
+    indexes = inspect(connection).get_indexes(DailyMetric.__tablename__)
+    if any(index["name"] == "uq_daily_metrics_user_date" for index in indexes):
+        return
+    newest = select(func.max(DailyMetric.id)).group_by(DailyMetric.user_id, DailyMetric.metric_date)
+    result = connection.execute(
+        delete(DailyMetric.__table__).where(DailyMetric.id.not_in(newest))
+    )
+    if result.rowcount:
+        logger.warning("Removed %d duplicate rows from daily_metrics", result.rowcount)
+
+
+async def prepare_database() -> None:
+    """Create missing tables and indexes and build data derived before it existed."""
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(remove_duplicate_daily_metrics)
+        await conn.run_sync(create_missing_indexes, Base.metadata)
+    async with AsyncSessionLocal() as session:
+        await rebuild_rollups_if_empty(session)
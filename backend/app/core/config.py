@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal, Optional
 from pydantic import BaseSettings, Field
 
 
@@ -7,12 +8,108 @@ class Settings(BaseSettings):
     database_url: str = Field(
         "sqlite+aiosqlite:///./app.db", env="DATABASE_URL"
     )
+    database_read_url: Optional[str] = Field(None, env="DATABASE_READ_URL")
+    read_your_writes_seconds: float = Field(10.0, ge=0, env="READ_YOUR_WRITES_SECONDS")
+    db_pool_size: int = Field(10, ge=1, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(20, ge=0, env="DB_MAX_OVERFLOW")
+    db_pool_timeout_seconds: float = Field(30.0, gt=0, env="DB_POOL_TIMEOUT_SECONDS")
+    db_pool_recycle_seconds: int = Field(1800, ge=-1, env="DB_POOL_RECYCLE_SECONDS")
+    db_pool_pre_ping: bool = Field(True, env="DB_POOL_PRE_PING")
+    db_statement_cache_size: int = Field(500, ge=0, env="DB_STATEMENT_CACHE_SIZE")
+    sqlite_journal_mode: Literal["wal", "delete", "truncate", "persist", "memory"] = Field(
+        "wal", env="SQLITE_JOURNAL_MODE"
+    )
+    sqlite_synchronous: Literal["off", "normal", "full", "extra"] = Field(
+        "normal", env="SQLITE_SYNCHRONOUS"
+    )
+    sqlite_busy_timeout_seconds: float = Field(5.0, ge=0, env="SQLITE_BUSY_TIMEOUT_SECONDS")
+    sqlite_mmap_size_mb: int = Field(256, ge=0, env="SQLITE_MMAP_SIZE_MB")
+    sqlite_cache_size_mb: int = Field(64, ge=0, env="SQLITE_CACHE_SIZE_MB")
     facebook_api_version: str = Field("v18.0", env="FACEBOOK_API_VERSION")
     secret_key: str = Field("super-secret-key", env="SECRET_KEY")
     jwt_algorithm: str = Field("HS256", env="JWT_ALGORITHM")
     access_token_expire_minutes: int = Field(60, env="ACCESS_TOKEN_EXPIRE_MINUTES")
+    token_claims_cache_seconds: float = Field(30.0, ge=0, env="TOKEN_CLAIMS_CACHE_SECONDS")
+    principal_cache_ttl_seconds: float = Field(60.0, ge=0, env="PRINCIPAL_CACHE_TTL_SECONDS")
+    auth_cache_max_entries: int = Field(10_000, ge=1, env="AUTH_CACHE_MAX_ENTRIES")
+    password_hasher: Literal["scrypt", "argon2"] = Field("scrypt", env="PASSWORD_HASHER")
+    password_scrypt_log2_n: int = Field(14, ge=1, le=24, env="PASSWORD_SCRYPT_LOG2_N")
+    password_scrypt_r: int = Field(8, ge=1, env="PASSWORD_SCRYPT_R")
+    password_scrypt_p: int = Field(1, ge=1, env="PASSWORD_SCRYPT_P")
+    password_argon2_time_cost: int = Field(3, ge=1, env="PASSWORD_ARGON2_TIME_COST")
+    password_argon2_memory_kib: int = Field(64 * 1024, ge=8, env="PASSWORD_ARGON2_MEMORY_KIB")
+    password_argon2_parallelism: int = Field(1, ge=1, env="PASSWORD_ARGON2_PARALLELISM")
+    password_hash_workers: int = Field(2, ge=1, env="PASSWORD_HASH_WORKERS")
+    scheduler_enabled: bool = Field(True, env="SCHEDULER_ENABLED")
+    worker_processes: int = Field(1, ge=1, env="WORKER_PROCESSES")
     scheduler_daily_hour_utc: int = Field(3, ge=0, le=23, env="SCHEDULER_DAILY_HOUR_UTC")
     scheduler_daily_minute_utc: int = Field(15, ge=0, le=59, env="SCHEDULER_DAILY_MINUTE_UTC")
+    sync_user_concurrency: int = Field(5, ge=1, env="SYNC_USER_CONCURRENCY")
+    sync_global_concurrency: int = Field(20, ge=1, env="SYNC_GLOBAL_CONCURRENCY")
+    sync_workers: int = Field(8, ge=1, env="SYNC_WORKERS")
+    sync_user_chunk_size: int = Field(500, ge=1, env="SYNC_USER_CHUNK_SIZE")
+    sync_run_deadline_seconds: float = Field(3 * 60 * 60, gt=0, env="SYNC_RUN_DEADLINE_SECONDS")
+    facebook_attribution_window_days: int = Field(
+        7, ge=0, env="FACEBOOK_ATTRIBUTION_WINDOW_DAYS"
+    )
+    adsense_attribution_window_days: int = Field(3, ge=0, env="ADSENSE_ATTRIBUTION_WINDOW_DAYS")
+    sync_lease_ttl_seconds: float = Field(60.0, gt=0, env="SYNC_LEASE_TTL_SECONDS")
+    sync_claim_batch_size: int = Field(100, ge=1, env="SYNC_CLAIM_BATCH_SIZE")
+    sync_work_item_lease_seconds: float = Field(
+        15 * 60, gt=0, env="SYNC_WORK_ITEM_LEASE_SECONDS"
+    )
+    sync_work_item_max_attempts: int = Field(3, ge=1, env="SYNC_WORK_ITEM_MAX_ATTEMPTS")
+    sync_poll_interval_seconds: float = Field(5.0, gt=0, env="SYNC_POLL_INTERVAL_SECONDS")
+    sync_jobs_inline: bool = Field(True, env="SYNC_JOBS_INLINE")
+    sync_job_retention_days: int = Field(7, ge=1, env="SYNC_JOB_RETENTION_DAYS")
+    backfill_max_days: int = Field(366, ge=1, env="BACKFILL_MAX_DAYS")
+    metrics_write_batch_size: int = Field(500, ge=1, env="METRICS_WRITE_BATCH_SIZE")
+    cache_backend: Literal["memory", "redis"] = Field("memory", env="CACHE_BACKEND")
+    cache_url: Optional[str] = Field(None, env="CACHE_URL")
+    cache_max_entries: int = Field(1024, ge=1, env="CACHE_MAX_ENTRIES")
+    metrics_cache_ttl_seconds: float = Field(300.0, gt=0, env="METRICS_CACHE_TTL_SECONDS")
+    events_backend: Literal["memory", "redis"] = Field("memory", env="EVENTS_BACKEND")
+    events_url: Optional[str] = Field(None, env="EVENTS_URL")
+    events_queue_size: int = Field(100, ge=1, env="EVENTS_QUEUE_SIZE")
+    events_keepalive_seconds: float = Field(15.0, gt=0, env="EVENTS_KEEPALIVE_SECONDS")
+    metrics_fast_serialization: bool = Field(False, env="METRICS_FAST_SERIALIZATION")
+    adsense_token_refresh_margin_seconds: float = Field(
+        300.0, ge=0, env="ADSENSE_TOKEN_REFRESH_MARGIN_SECONDS"
+    )
+    facebook_account_requests_per_second: float = Field(
+        5.0, gt=0, env="FACEBOOK_ACCOUNT_REQUESTS_PER_SECOND"
+    )
+    facebook_app_requests_per_second: float = Field(
+        50.0, gt=0, env="FACEBOOK_APP_REQUESTS_PER_SECOND"
+    )
+    facebook_usage_slowdown_pct: float = Field(
+        75.0, ge=0, le=100, env="FACEBOOK_USAGE_SLOWDOWN_PCT"
+    )
+    facebook_usage_pause_pct: float = Field(95.0, ge=0, le=100, env="FACEBOOK_USAGE_PAUSE_PCT")
+    adsense_requests_per_minute: float = Field(100.0, gt=0, env="ADSENSE_REQUESTS_PER_MINUTE")
+    rate_limit_default_pause_seconds: float = Field(
+        60.0, gt=0, env="RATE_LIMIT_DEFAULT_PAUSE_SECONDS"
+    )
+    rate_limit_max_wait_seconds: float = Field(30.0, ge=0, env="RATE_LIMIT_MAX_WAIT_SECONDS")
+    provider_retry_attempts: int = Field(3, ge=1, env="PROVIDER_RETRY_ATTEMPTS")
+    provider_retry_base_delay_seconds: float = Field(
+        0.5, ge=0, env="PROVIDER_RETRY_BASE_DELAY_SECONDS"
+    )
+    provider_retry_max_delay_seconds: float = Field(
+        10.0, ge=0, env="PROVIDER_RETRY_MAX_DELAY_SECONDS"
+    )
+    circuit_breaker_failure_threshold: int = Field(
+        5, ge=1, env="CIRCUIT_BREAKER_FAILURE_THRESHOLD"
+    )
+    circuit_breaker_cooldown_seconds: float = Field(
+        15 * 60, gt=0, env="CIRCUIT_BREAKER_COOLDOWN_SECONDS"
+    )
+    http_pool_max_connections: int = Field(100, ge=1, env="HTTP_POOL_MAX_CONNECTIONS")
+    http_pool_max_keepalive: int = Field(20, ge=0, env="HTTP_POOL_MAX_KEEPALIVE")
+    http_keepalive_expiry_seconds: float = Field(30.0, ge=0, env="HTTP_KEEPALIVE_EXPIRY_SECONDS")
+    http_timeout_seconds: float = Field(30.0, gt=0, env="HTTP_TIMEOUT_SECONDS")
+    http_connect_timeout_seconds: float = Field(10.0, gt=0, env="HTTP_CONNECT_TIMEOUT_SECONDS")
+    internal_metrics_token: Optional[str] = Field(None, env="INTERNAL_METRICS_TOKEN")
 
     class Config:
         env_file = ".env"
@@ -1,11 +1,87 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import MetaData, and_, event, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-from .config import get_settings
+from .config import Settings, get_settings
+from .instrumentation import instrument_engine
 
 settings = get_settings()
 
-engine = create_async_engine(settings.database_url, echo=False, future=True)
+_ASYNC_DRIVERS = {
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def _sqlite_pragmas(settings: Settings) -> List[str]:
+    return [
+        f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_seconds * 1000)}",
+        f"PRAGMA mmap_size={settings.sqlite_mmap_size_mb * 1024 * 1024}",
+        # Negative sizes are in KiB rather than pages.
+        f"PRAGMA cache_size={-settings.sqlite_cache_size_mb * 1024}",
+    ]
+
+
+def create_database_engine(database_url: str, settings: Optional[Settings] = None) -> AsyncEngine:
+    """Create an async engine with the pool and driver tuning of ``settings``.
+
+    Plain ``postgresql://`` and ``sqlite://`` URLs get their async driver
+    (asyncpg, aiosqlite). Postgres connections cache prepared statements; SQLite
+    connections are switched to WAL on connect, so readers are not blocked by
+    the sync's writes.
+    """
+
+    settings = settings or get_settings()
+    url = make_url(database_url)
+    url = url.set(drivername=_ASYNC_DRIVERS.get(url.drivername, url.drivername))
+    options: Dict[str, Any] = {"echo": False, "pool_pre_ping": settings.db_pool_pre_ping}
+    connect_args: Dict[str, Any] = {}
+
+    in_memory = url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+    if not in_memory:
+        options.update(
+            # aiosqlite would otherwise open a new connection, and lose its page
+            # cache, for every session.
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout_seconds,
+            pool_recycle=settings.db_pool_recycle_seconds,
+        )
+    if url.get_driver_name() == "asyncpg":
+        # SQLAlchemy's cache of prepared statements and asyncpg's own; set both
+        # to 0 behind PgBouncer in transaction mode.
+        connect_args["prepared_statement_cache_size"] = settings.db_statement_cache_size
+        connect_args["statement_cache_size"] = settings.db_statement_cache_size
+    if url.get_backend_name() == "sqlite":
+        connect_args["timeout"] = settings.sqlite_busy_timeout_seconds
+
+    engine = create_async_engine(url, connect_args=connect_args, **options)
+
+    if url.get_backend_name() == "sqlite":
+        pragmas = _sqlite_pragmas(settings)
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def _apply_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+
+    return engine
+
+
+engine = create_database_engine(settings.database_url, settings)
+instrument_engine(engine, "primary")
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
@@ -14,6 +90,135 @@ AsyncSessionLocal = sessionmaker(
 )
 
 
+# Dashboard reads go to the replica when DATABASE_READ_URL is set.
+read_engine = engine
+AsyncReadSessionLocal = AsyncSessionLocal
+if settings.database_read_url:
+    read_engine = create_database_engine(settings.database_read_url, settings)
+    instrument_engine(read_engine, "replica")
+    AsyncReadSessionLocal = sessionmaker(
+        bind=read_engine,
+        expire_on_commit=False,
+        class_=AsyncSession,
+    )
+
+
 async def get_session() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_read_session() -> AsyncSession:
+    """Yield a session for reads only, on the replica when one is configured."""
+
+    async with AsyncReadSessionLocal() as session:
+        yield session
+
+
+async def dispose_engines() -> None:
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
+
+
+def create_missing_indexes(connection: Connection, metadata: MetaData) -> None:
+    """Create indexes declared on tables that already existed before they were added.
+
+    ``create_all`` only creates indexes together with new tables.
+    """
+
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+_ON_CONFLICT_INSERTS = {
+    "sqlite": sqlite_insert,
+    "postgresql": postgresql_insert,
+}
+
+
+async def upsert_rows(
+    session: AsyncSession,
+    model: Any,
+    values: List[Dict[str, Any]],
+    key_columns: Sequence[str],
+    batch_size: int = 500,
+) -> None:
+    """Insert ``values`` into ``model``'s table, updating rows whose key already exists.
+
+    Uses multi-row ``INSERT ... ON CONFLICT DO UPDATE`` on SQLite and Postgres
+    (``key_columns`` must be covered by a unique index) and falls back to a
+    SELECT followed by an ORM update or insert per row on other databases. The
+    caller is responsible for committing.
+    """
+
+    if not values:
+        return
+
+    insert = _ON_CONFLICT_INSERTS.get(session.get_bind().dialect.name)
+    if insert is None:
+        for value in values:
+            result = await session.execute(
+                select(model).where(
+                    and_(*(getattr(model, column) == value[column] for column in key_columns))
+                )
+            )
+            instance = result.scalar_one_or_none()
+            if instance is None:
+                session.add(model(**value))
+            else:
+                for column, column_value in value.items():
+                    setattr(instance, column, column_value)
+        await session.flush()
+        return
+
+    update_columns = [column for column in values[0] if column not in key_columns]
+    for offset in range(0, len(values), batch_size):
+        statement = insert(model).values(values[offset : offset + batch_size])
+        statement = statement.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={column: statement.excluded[column] for column in update_columns},
+        )
+        await session.execute(statement)
+
+
+async def insert_missing_rows(
+    session: AsyncSession,
+    model: Any,
+    values: List[Dict[str, Any]],
+    key_columns: Sequence[str],
+    batch_size: int = 500,
+) -> int:
+    """Insert the ``values`` whose key is not in ``model``'s table yet; return how many were.
+
+    Uses ``INSERT ... ON CONFLICT DO NOTHING`` on SQLite and Postgres and a
+    SELECT per row elsewhere. The caller is responsible for committing.
+    """
+
+    if not values:
+        return 0
+
+    insert = _ON_CONFLICT_INSERTS.get(session.get_bind().dialect.name)
+    if insert is None:
+        inserted = 0
+        for value in values:
+            result = await session.execute(
+                select(model).where(
+                    and_(*(getattr(model, column) == value[column] for column in key_columns))
+                )
+            )
+            if result.scalar_one_or_none() is None:
+                session.add(model(**value))
+                inserted += 1
+        await session.flush()
+        return inserted
+
+    inserted = 0
+    for offset in range(0, len(values), batch_size):
+        statement = insert(model).values(values[offset : offset + batch_size])
+        result = await session.execute(
+            statement.on_conflict_do_nothing(index_elements=list(key_columns))
+        )
+        inserted += result.rowcount
+    return inserted
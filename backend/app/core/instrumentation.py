@@ -0,0 +1,190 @@
+"""Prometheus metrics about the service itself, served at ``/metrics-internal``.
+
+With several processes (uvicorn workers, ``python -m app.worker``) point
+``PROMETHEUS_MULTIPROC_DIR`` at an empty directory shared by all of them before
+they start: every process then records into it and any scrape reports the sum.
+"""
+
+from __future__ import annotations
+
+from typing import Any, List, Tuple
+
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+_FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+_SYNC_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time until the response started, per route template.",
+    ["method", "route", "status"],
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "SQL statements executed, by database and statement type.",
+    ["database", "statement"],
+    buckets=_FAST_BUCKETS,
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Connections the pools keep open (excluding overflow).",
+    ["database"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pools.",
+    ["database"],
+    multiprocess_mode="livesum",
+)
+PROVIDER_REQUEST_DURATION = Histogram(
+    "provider_request_duration_seconds",
+    "Latency of the requests sent to the ad providers, per host.",
+    ["host"],
+)
+PROVIDER_REQUESTS = Counter(
+    "provider_requests",
+    "Requests sent to the ad providers, by status class or 'error' for transport failures.",
+    ["host", "outcome"],
+)
+PROVIDER_THROTTLED = Counter(
+    "provider_throttled",
+    "Times a provider asked to slow down: a 429, or Graph API usage at the pause threshold.",
+    ["host", "reason"],
+)
+SYNC_RUN_DURATION = Histogram(
+    "sync_run_duration_seconds",
+    "Duration of this process's share of a daily sync run (scheduled or --once).",
+    buckets=_SYNC_BUCKETS,
+)
+SYNC_USER_DURATION = Histogram(
+    "sync_user_duration_seconds",
+    "Time spent fetching one user's metrics during the daily sync.",
+    ["outcome"],
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests", "Cache lookups, by cache and hit or miss.", ["cache", "result"]
+)
+CACHE_EVICTIONS = Counter(
+    "cache_evictions", "Entries dropped to stay under a cache's size limit.", ["cache"]
+)
+CACHE_ENTRIES = Gauge(
+    "cache_entries", "Entries held by the in-process caches.", ["cache"], multiprocess_mode="livesum"
+)
+
+
+def _multiprocess() -> bool:
+    return "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Return the exposition of every metric and its content type."""
+
+    if _multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_stopped() -> None:
+    """Drop this process's live gauges from the shared directory; call on shutdown."""
+
+    if _multiprocess():
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def _statement_type(statement: str) -> str:
+    words = statement.split(None, 1)
+    verb = words[0].lower() if words else ""
+    return verb if verb in ("select", "insert", "update", "delete") else "other"
+
+
+def instrument_engine(engine: AsyncEngine, database: str) -> None:
+    """Time every statement of ``engine`` and track its pool under the ``database`` label."""
+
+    sync_engine = engine.sync_engine
+    size = getattr(sync_engine.pool, "size", None)
+    DB_POOL_SIZE.labels(database).set(size() if callable(size) else 1)
+    checked_out = DB_POOL_CHECKED_OUT.labels(database)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _started(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _finished(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        started: List[float] = conn.info["query_started_at"]
+        DB_QUERY_DURATION.labels(database, _statement_type(statement)).observe(
+            time.perf_counter() - started.pop()
+        )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _failed(context: Any) -> None:
+        connection = context.connection
+        if connection is not None and connection.info.get("query_started_at"):
+            connection.info["query_started_at"].pop()
+
+    @event.listens_for(sync_engine, "checkout")
+    def _checked_out(*args: Any) -> None:
+        checked_out.inc()
+
+    @event.listens_for(sync_engine, "checkin")
+    def _checked_in(*args: Any) -> None:
+        checked_out.dec()
+
+
+class RequestMetricsMiddleware:
+    """Record ``http_request_duration_seconds`` for every HTTP request.
+
+    Labelled with the route template rather than the path, so ids do not create
+    new series; the time stops when the response starts, which keeps streamed
+    exports and event streams meaningful.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        responded = False
+
+        def observe(status_code: int) -> None:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"], getattr(route, "path", "unmatched"), str(status_code)
+            ).observe(time.perf_counter() - started)
+
+        async def send_with_metrics(message: Message) -> None:
+            nonlocal responded
+            if message["type"] == "http.response.start" and not responded:
+                responded = True
+                observe(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        except Exception:
+            if not responded:
+                observe(500)
+            raise
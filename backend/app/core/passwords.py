@@ -0,0 +1,246 @@
+"""Password hashing off the event loop.
+
+Hashes are stored in a self-describing format, so the algorithm and its cost
+can change at any time: hashes made with other settings keep verifying and are
+replaced on the user's next successful login.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import re
+
+from .config import get_settings
+
+T = TypeVar("T")
+
+
+def _b64encode(value: bytes) -> str:
+    return base64.b64encode(value).decode("ascii").rstrip("=")
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.b64decode(value + "=" * (-len(value) % 4))
+
+
+class PasswordVerifier(ABC):
+    """Interface of the algorithms whose stored hashes can be checked."""
+
+    @abstractmethod
+    def verify(self, password: str, encoded: str) -> bool:
+        ...
+
+    @abstractmethod
+    def identifies(self, encoded: str) -> bool:
+        """Whether ``encoded`` was produced by this algorithm, whatever its cost."""
+
+    @abstractmethod
+    def needs_rehash(self, encoded: str) -> bool:
+        """Whether ``encoded`` should be replaced by a hash of the configured hasher."""
+
+
+class PasswordHasher(PasswordVerifier):
+    """Interface of the algorithms new password hashes are made with."""
+
+    @abstractmethod
+    def hash(self, password: str) -> str:
+        ...
+
+
+class ScryptHasher(PasswordHasher):
+    """scrypt from the standard library, as ``$scrypt$ln=14,r=8,p=1$<salt>$<hash>``."""
+
+    _PATTERN = re.compile(r"^\$scrypt\$ln=(\d+),r=(\d+),p=(\d+)\$([^$]+)\$([^$]+)$")
+
+    def __init__(self, log2_n: int = 14, r: int = 8, p: int = 1) -> None:
+        self.log2_n = log2_n
+        self.r = r
+        self.p = p
+
+    @staticmethod
+    def _derive(password: str, salt: bytes, log2_n: int, r: int, p: int) -> bytes:
+        n = 2**log2_n
+        return hashlib.scrypt(
+            password.encode("utf-8"),
+            salt=salt,
+            n=n,
+            r=r,
+            p=p,
+            maxmem=256 * n * r + 1024 * 1024,
+            dklen=32,
+        )
+
+    def hash(self, password: str) -> str:
+        salt = os.urandom(16)
+        digest = self._derive(password, salt, self.log2_n, self.r, self.p)
+        return (
+            f"$scrypt$ln={self.log2_n},r={self.r},p={self.p}"
+            f"${_b64encode(salt)}${_b64encode(digest)}"
+        )
+
+    def verify(self, password: str, encoded: str) -> bool:
+        match = self._PATTERN.match(encoded)
+        if match is None:
+            return False
+        log2_n, r, p = (int(value) for value in match.group(1, 2, 3))
+        digest = self._derive(password, _b64decode(match.group(4)), log2_n, r, p)
+        return hmac.compare_digest(digest, _b64decode(match.group(5)))
+
+    def identifies(self, encoded: str) -> bool:
+        return encoded.startswith("$scrypt$")
+
+    def needs_rehash(self, encoded: str) -> bool:
+        match = self._PATTERN.match(encoded)
+        return match is None or tuple(int(value) for value in match.group(1, 2, 3)) != (
+            self.log2_n,
+            self.r,
+            self.p,
+        )
+
+
+class Argon2Hasher(PasswordHasher):
+    """argon2id through the optional ``argon2-cffi`` package."""
+
+    def __init__(
+        self, time_cost: int = 3, memory_kib: int = 64 * 1024, parallelism: int = 1
+    ) -> None:
+        try:
+            import argon2
+        except ImportError as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError(
+                "PASSWORD_HASHER=argon2 requires the 'argon2-cffi' package"
+            ) from exc
+
+        self._errors = (argon2.exceptions.VerificationError, argon2.exceptions.InvalidHashError)
+        self._hasher = argon2.PasswordHasher(
+            time_cost=time_cost,
+            memory_cost=memory_kib,
+            parallelism=parallelism,
+            type=argon2.Type.ID,
+        )
+
+    def hash(self, password: str) -> str:
+        return self._hasher.hash(password)
+
+    def verify(self, password: str, encoded: str) -> bool:
+        try:
+            return self._hasher.verify(encoded, password)
+        except self._errors:
+            return False
+
+    def identifies(self, encoded: str) -> bool:
+        return encoded.startswith("$argon2")
+
+    def needs_rehash(self, encoded: str) -> bool:
+        return self._hasher.check_needs_rehash(encoded)
+
+
+class LegacySha256Verifier(PasswordVerifier):
+    """The unsalted SHA-256 hex digests stored before hashes carried their algorithm.
+
+    No longer produced; such hashes always need rehashing.
+    """
+
+    _PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+    def verify(self, password: str, encoded: str) -> bool:
+        digest = hashlib.sha256(password.encode("utf-8")).hexdigest()
+        return hmac.compare_digest(digest, encoded)
+
+    def identifies(self, encoded: str) -> bool:
+        return self._PATTERN.match(encoded) is not None
+
+    def needs_rehash(self, encoded: str) -> bool:
+        return True
+
+
+@lru_cache()
+def get_password_hasher() -> PasswordHasher:
+    settings = get_settings()
+    if settings.password_hasher == "argon2":
+        return Argon2Hasher(
+            time_cost=settings.password_argon2_time_cost,
+            memory_kib=settings.password_argon2_memory_kib,
+            parallelism=settings.password_argon2_parallelism,
+        )
+    return ScryptHasher(
+        log2_n=settings.password_scrypt_log2_n,
+        r=settings.password_scrypt_r,
+        p=settings.password_scrypt_p,
+    )
+
+
+_verifiers: Dict[str, PasswordVerifier] = {}
+_VERIFIER_FACTORIES: Tuple[Tuple[str, Callable[[], PasswordVerifier]], ...] = (
+    ("scrypt", ScryptHasher),
+    ("argon2", Argon2Hasher),
+    ("legacy", LegacySha256Verifier),
+)
+
+
+def _verifier_for(encoded: str) -> Optional[PasswordVerifier]:
+    configured = get_password_hasher()
+    if configured.identifies(encoded):
+        return configured
+    for name, factory in _VERIFIER_FACTORIES:
+        verifier = _verifiers.get(name)
+        if verifier is None:
+            try:
+                verifier = _verifiers[name] = factory()
+            except RuntimeError:
+                continue
+        if verifier.identifies(encoded):
+            return verifier
+    return None
+
+
+@lru_cache()
+def _get_executor() -> ThreadPoolExecutor:
+    # hashlib.scrypt and argon2 release the GIL, so the threads hash in parallel
+    # while the event loop keeps serving requests.
+    return ThreadPoolExecutor(
+        max_workers=get_settings().password_hash_workers, thread_name_prefix="password-hash"
+    )
+
+
+async def _run(function: Callable[..., T], *args: Any) -> T:
+    return await asyncio.get_running_loop().run_in_executor(_get_executor(), function, *args)
+
+
+async def hash_password(password: str) -> str:
+    return await _run(get_password_hasher().hash, password)
+
+
+async def verify_password(password: str, encoded: str) -> bool:
+    verifier = _verifier_for(encoded)
+    if verifier is None:
+        return False
+    return await _run(verifier.verify, password, encoded)
+
+
+def password_needs_rehash(encoded: str) -> bool:
+    """Whether ``encoded`` should be replaced by :func:`hash_password` on the next login."""
+
+    configured = get_password_hasher()
+    return not configured.identifies(encoded) or configured.needs_rehash(encoded)
+
+
+@lru_cache()
+def _dummy_hash() -> str:
+    return get_password_hasher().hash("dummy password")
+
+
+async def burn_verification(password: str) -> None:
+    """Spend the time of a verification, so unknown accounts answer as slowly as known ones."""
+
+    encoded = await _run(_dummy_hash)
+    await verify_password(password, encoded)
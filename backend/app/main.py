@@ -3,35 +3,42 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
-from .api import auth, integrations, metrics, notifications, users
+from .api import auth, events, integrations, internal, metrics, notifications, users
+from .bootstrap import prepare_database
 from .core.config import get_settings
-from .core.database import engine
-from .models.base import Base
+from .core.database import dispose_engines
+from .core.instrumentation import RequestMetricsMiddleware, mark_process_stopped
+from .services.http import close_http_clients
 from .services.scheduler import shutdown_scheduler, start_scheduler
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    await prepare_database()
     app.state.scheduler = None
-    scheduler = await start_scheduler()
-    app.state.scheduler = scheduler
+    if get_settings().scheduler_enabled:
+        app.state.scheduler = await start_scheduler()
     try:
         yield
     finally:
         await shutdown_scheduler(app.state.scheduler)
+        await close_http_clients()
+        await dispose_engines()
+        mark_process_stopped()
 
 
 def create_app() -> FastAPI:
     settings = get_settings()
     app = FastAPI(title=settings.app_name, lifespan=lifespan)
+    app.add_middleware(RequestMetricsMiddleware)
 
     app.include_router(auth.router)
     app.include_router(users.router)
     app.include_router(integrations.router)
     app.include_router(metrics.router)
     app.include_router(notifications.router)
+    app.include_router(events.router)
+    app.include_router(internal.router)
 
     return app
 
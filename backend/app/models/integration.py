@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from sqlalchemy import Column, DateTime, Enum as SQLEnum, ForeignKey, Integer, JSON
+from sqlalchemy import Column, Date, DateTime, Enum as SQLEnum, ForeignKey, Integer, JSON
 from sqlalchemy.orm import relationship
 
 from .base import Base
@@ -21,3 +21,20 @@ class IntegrationAccount(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User", backref="integrations")
+
+
+class IntegrationSyncState(Base):
+    """Watermark of the days whose values can no longer change for an integration.
+
+    Every day in ``settled_from``..``settled_through`` was fetched after its
+    attribution window had closed and never needs to be fetched again.
+    """
+
+    __tablename__ = "integration_sync_states"
+
+    integration_id = Column(
+        Integer, ForeignKey("integration_accounts.id", ondelete="CASCADE"), primary_key=True
+    )
+    settled_from = Column(Date, nullable=True)
+    settled_through = Column(Date, nullable=True)
+    last_synced_at = Column(DateTime, nullable=True)
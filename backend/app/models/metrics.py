@@ -1,12 +1,29 @@
 from datetime import date, datetime
-from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, Integer
-from sqlalchemy.orm import relationship
+from enum import Enum
+from sqlalchemy import Column, Date, DateTime, Enum as SQLEnum, Float, ForeignKey, Index, Integer
+from sqlalchemy.orm import backref, relationship
 
 from .base import Base
 
 
+class MetricGranularity(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+
 class DailyMetric(Base):
     __tablename__ = "daily_metrics"
+    __table_args__ = (
+        # Also serves range reads; on Postgres the included columns make it covering.
+        Index(
+            "uq_daily_metrics_user_date",
+            "user_id",
+            "metric_date",
+            unique=True,
+            postgresql_include=["spend", "revenue", "roi"],
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -17,3 +34,58 @@ class DailyMetric(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User", backref="metrics")
+
+
+class MetricRollup(Base):
+    """Weekly or monthly sums of ``daily_metrics``, kept current on every daily write."""
+
+    __tablename__ = "metric_rollups"
+    __table_args__ = (
+        Index(
+            "uq_metric_rollups_user_period",
+            "user_id",
+            "granularity",
+            "period_start",
+            unique=True,
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    granularity = Column(SQLEnum(MetricGranularity), nullable=False)
+    period_start = Column(Date, nullable=False)
+    spend = Column(Float, nullable=False)
+    revenue = Column(Float, nullable=False)
+    roi_sum = Column(Float, nullable=False)
+    day_count = Column(Integer, nullable=False)
+
+    user = relationship("User", backref="metric_rollups")
+
+
+class IntegrationDailyMetric(Base):
+    """Spend and revenue of one integration on one day; ``daily_metrics`` sums these per user."""
+
+    __tablename__ = "integration_daily_metrics"
+    __table_args__ = (
+        Index(
+            "uq_integration_daily_metrics_integration_date",
+            "integration_id",
+            "metric_date",
+            unique=True,
+        ),
+        Index("ix_integration_daily_metrics_user_date", "user_id", "metric_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    integration_id = Column(
+        Integer, ForeignKey("integration_accounts.id", ondelete="CASCADE"), nullable=False
+    )
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    metric_date = Column(Date, nullable=False)
+    spend = Column(Float, nullable=False)
+    revenue = Column(Float, nullable=False)
+    synced_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    integration = relationship(
+        "IntegrationAccount", backref=backref("daily_metrics", passive_deletes=True)
+    )
@@ -0,0 +1,151 @@
+from datetime import datetime
+from enum import Enum
+
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    Enum as SQLEnum,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
+from sqlalchemy.orm import relationship
+
+from .base import Base
+
+
+class SchedulerLease(Base):
+    """Named lock held by one process at a time until ``expires_at``, renewed by heartbeats."""
+
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String(64), primary_key=True)
+    holder = Column(String(128), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    heartbeat_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class SyncRunStatus(str, Enum):
+    ENQUEUING = "enqueuing"
+    ENQUEUED = "enqueued"
+    FINISHED = "finished"
+
+
+class SyncRun(Base):
+    """One scheduled sync of every user for a day, shared by all worker processes."""
+
+    __tablename__ = "sync_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    metric_date = Column(Date, nullable=False, unique=True)
+    status = Column(SQLEnum(SyncRunStatus), nullable=False, default=SyncRunStatus.ENQUEUING)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class WorkItemStatus(str, Enum):
+    PENDING = "pending"
+    CLAIMED = "claimed"
+    DONE = "done"
+
+
+class SyncWorkItem(Base):
+    """A user to sync within a :class:`SyncRun`, claimed by one worker at a time."""
+
+    __tablename__ = "sync_work_items"
+    __table_args__ = (
+        Index("uq_sync_work_items_run_user", "run_id", "user_id", unique=True),
+        Index("ix_sync_work_items_run_status", "run_id", "status"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("sync_runs.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    status = Column(SQLEnum(WorkItemStatus), nullable=False, default=WorkItemStatus.PENDING)
+    claimed_by = Column(String(128), nullable=True)
+    claimed_until = Column(DateTime, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+
+
+class SyncJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    PARTIAL = "partial"
+    FAILED = "failed"
+
+
+class SyncJob(Base):
+    """A sync of one user's days requested through the API and run in the background.
+
+    ``active_key`` identifies the request while the job is queued or running, so
+    identical requests share the job; it is cleared once the job finishes.
+    """
+
+    __tablename__ = "sync_jobs"
+    __table_args__ = (
+        Index("uq_sync_jobs_active_key", "active_key", unique=True),
+        Index("ix_sync_jobs_status", "status"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    integration_ids = Column(JSON, nullable=True)
+    force = Column(Boolean, nullable=False, default=False)
+    status = Column(SQLEnum(SyncJobStatus), nullable=False, default=SyncJobStatus.QUEUED)
+    active_key = Column(String(255), nullable=True)
+    claimed_by = Column(String(128), nullable=True)
+    claimed_until = Column(DateTime, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    integrations = relationship(
+        "SyncJobIntegration",
+        order_by="SyncJobIntegration.integration_id",
+        lazy="selectin",
+        passive_deletes=True,
+    )
+
+
+class SyncJobIntegrationStatus(str, Enum):
+    PENDING = "pending"
+    FETCHED = "fetched"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+
+class SyncJobIntegration(Base):
+    """Progress of one integration within a :class:`SyncJob`.
+
+    ``days`` counts the days fetched from the provider; integrations whose days
+    are all settled are ``skipped`` without any call.
+    """
+
+    __tablename__ = "sync_job_integrations"
+    __table_args__ = (
+        Index("uq_sync_job_integrations_job_integration", "job_id", "integration_id", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("sync_jobs.id", ondelete="CASCADE"), nullable=False)
+    # Kept without a foreign key so the history survives deleting the integration.
+    integration_id = Column(Integer, nullable=False)
+    status = Column(
+        SQLEnum(SyncJobIntegrationStatus),
+        nullable=False,
+        default=SyncJobIntegrationStatus.PENDING,
+    )
+    days = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
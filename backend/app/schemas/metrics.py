@@ -1,7 +1,15 @@
 from datetime import date, datetime
-from typing import List
+from enum import Enum
+from typing import List, Optional
 from pydantic import BaseModel
 
+from ..models.scheduling import SyncJobIntegrationStatus, SyncJobStatus
+
+
+class MetricsFormat(str, Enum):
+    ROWS = "rows"
+    COLUMNAR = "columnar"
+
 
 class DailyMetricRead(BaseModel):
     id: int
@@ -27,3 +35,45 @@ class MetricsResponse(BaseModel):
     total_spend: float
     total_revenue: float
     average_roi: float
+    weighted_roi: float
+
+
+class MetricsColumnarResponse(BaseModel):
+    dates: List[date]
+    spend: List[float]
+    revenue: List[float]
+    roi: List[float]
+    total_spend: float
+    total_revenue: float
+    average_roi: float
+    weighted_roi: float
+
+
+class SyncJobIntegrationRead(BaseModel):
+    integration_id: int
+    status: SyncJobIntegrationStatus
+    days: int
+    error: Optional[str]
+    updated_at: datetime
+
+    class Config:
+        orm_mode = True
+
+
+class SyncJobRead(BaseModel):
+    id: int
+    status: SyncJobStatus
+    start_date: date
+    end_date: date
+    integration_ids: Optional[List[int]]
+    force: bool
+    error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    integrations: List[SyncJobIntegrationRead]
+    # Filled in once the job has finished.
+    metrics: List[MetricsSummary] = []
+
+    class Config:
+        orm_mode = True
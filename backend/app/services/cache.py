@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Generic, Hashable, Iterable, Optional, Tuple, TypeVar
+
+import secrets
+import time
+
+from ..core.config import get_settings
+from ..core.instrumentation import CACHE_ENTRIES, CACHE_EVICTIONS, CACHE_REQUESTS
+
+
+V = TypeVar("V")
+
+
+def _initial_version() -> int:
+    return secrets.randbelow(2**31)
+
+
+class LocalTTLCache(Generic[V]):
+    """Bounded in-process LRU of arbitrary values, each with its own time to live.
+
+    For values that cannot be serialized or must be read synchronously; shared
+    data belongs in :func:`get_cache`.
+    """
+
+    def __init__(self, max_entries: int, name: str) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._hit_counter = CACHE_REQUESTS.labels(name, "hit")
+        self._miss_counter = CACHE_REQUESTS.labels(name, "miss")
+        self._eviction_counter = CACHE_EVICTIONS.labels(name)
+        self._size_gauge = CACHE_ENTRIES.labels(name)
+
+    def get(self, key: Hashable) -> Optional[V]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+                self._size_gauge.set(len(self._entries))
+            self.misses += 1
+            self._miss_counter.inc()
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self._hit_counter.inc()
+        return entry[1]
+
+    def set(self, key: Hashable, value: V, ttl_seconds: float) -> None:
+        if ttl_seconds <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+            self._eviction_counter.inc()
+        self._size_gauge.set(len(self._entries))
+
+    def pop(self, key: Hashable) -> None:
+        if self._entries.pop(key, None) is not None:
+            self._size_gauge.set(len(self._entries))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+        }
+
+
+class CacheBackend(ABC):
+    """Interface of the byte caches used to serve repeated reads."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        ...
+
+    @abstractmethod
+    async def get_version(self, key: str) -> int:
+        """Return the counter stored under ``key``.
+
+        Counters start at a random value so versions handed out before a restart,
+        or by another process with its own memory cache, are not reused.
+        """
+
+    @abstractmethod
+    async def bump_version(self, key: str) -> int:
+        ...
+
+    @abstractmethod
+    async def set_marker(self, key: str, ttl_seconds: float) -> None:
+        """Raise a flag that expires after ``ttl_seconds``.
+
+        Markers are kept apart from the cached values: they are never evicted to
+        make room for them and are not counted as hits or misses.
+        """
+
+    @abstractmethod
+    async def has_marker(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        ...
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU cache with per-entry TTL, on a :class:`LocalTTLCache`.
+
+    Version counters and markers are kept apart from the entries so they are
+    never evicted.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: LocalTTLCache[bytes] = LocalTTLCache(max_entries, "shared")
+        self._versions: Dict[str, int] = {}
+        self._markers: Dict[str, float] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        self._entries.set(key, value, ttl_seconds)
+
+    async def get_version(self, key: str) -> int:
+        return self._versions.setdefault(key, _initial_version())
+
+    async def bump_version(self, key: str) -> int:
+        version = await self.get_version(key) + 1
+        self._versions[key] = version
+        return version
+
+    async def set_marker(self, key: str, ttl_seconds: float) -> None:
+        now = time.monotonic()
+        if len(self._markers) >= self.max_entries:
+            for expired in [name for name, until in self._markers.items() if until <= now]:
+                del self._markers[expired]
+        self._markers[key] = now + ttl_seconds
+
+    async def has_marker(self, key: str) -> bool:
+        until = self._markers.get(key)
+        return until is not None and until > time.monotonic()
+
+    def stats(self) -> Dict[str, int]:
+        return self._entries.stats()
+
+
+class RedisCacheBackend(CacheBackend):
+    """Cache shared by every worker through Redis (or a compatible server).
+
+    Evictions are performed by the server according to its ``maxmemory`` policy
+    and are therefore not counted here.
+    """
+
+    def __init__(self, url: str) -> None:
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from exc
+
+        self._client = redis_asyncio.from_url(url)
+        self.hits = 0
+        self.misses = 0
+        self._hit_counter = CACHE_REQUESTS.labels("shared", "hit")
+        self._miss_counter = CACHE_REQUESTS.labels("shared", "miss")
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = await self._client.get(key)
+        if value is None:
+            self.misses += 1
+            self._miss_counter.inc()
+        else:
+            self.hits += 1
+            self._hit_counter.inc()
+        return value
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        await self._client.set(key, value, px=int(ttl_seconds * 1000))
+
+    async def get_version(self, key: str) -> int:
+        value = await self._client.get(key)
+        if value is None:
+            await self._client.set(key, _initial_version(), nx=True)
+            value = await self._client.get(key)
+        return int(value)
+
+    async def bump_version(self, key: str) -> int:
+        await self.get_version(key)
+        return int(await self._client.incr(key))
+
+    async def set_marker(self, key: str, ttl_seconds: float) -> None:
+        await self._client.set(key, b"1", px=int(ttl_seconds * 1000))
+
+    async def has_marker(self, key: str) -> bool:
+        return bool(await self._client.exists(key))
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": 0}
+
+
+@lru_cache()
+def get_cache() -> CacheBackend:
+    settings = get_settings()
+    if settings.cache_backend == "redis":
+        if not settings.cache_url:
+            raise RuntimeError("CACHE_BACKEND=redis requires CACHE_URL")
+        return RedisCacheBackend(settings.cache_url)
+    return MemoryCacheBackend(settings.cache_max_entries)
+
+
+METRICS_SCOPE = "metrics"
+INTEGRATIONS_SCOPE = "integrations"
+USERS_SCOPE = "users"
+
+
+def _version_key(scope: str, user_id: int) -> str:
+    return f"version:{scope}:{user_id}"
+
+
+async def data_version(scope: str, user_id: int) -> int:
+    """Return the user's change counter for ``scope``; writers bump it after committing."""
+
+    return await get_cache().get_version(_version_key(scope, user_id))
+
+
+async def bump_data_version(scope: str, user_ids: Iterable[int]) -> None:
+    cache = get_cache()
+    user_ids = set(user_ids)
+    for user_id in user_ids:
+        await cache.bump_version(_version_key(scope, user_id))
+    await record_user_writes(user_ids)
+
+
+def _recent_write_key(user_id: int) -> str:
+    return f"recent-write:{user_id}"
+
+
+async def record_user_writes(user_ids: Iterable[int]) -> None:
+    """Keep the users' reads on the primary for ``READ_YOUR_WRITES_SECONDS``.
+
+    Called after committing; a replica may not have replayed the change yet.
+    Does nothing without ``DATABASE_READ_URL``.
+    """
+
+    settings = get_settings()
+    if not settings.database_read_url or settings.read_your_writes_seconds <= 0:
+        return
+    cache = get_cache()
+    for user_id in set(user_ids):
+        await cache.set_marker(_recent_write_key(user_id), settings.read_your_writes_seconds)
+
+
+async def wrote_recently(user_id: int) -> bool:
+    if not get_settings().database_read_url:
+        return False
+    return await get_cache().has_marker(_recent_write_key(user_id))
+
+
+async def metrics_cache_key(user_id: int, *parts: object) -> str:
+    """Build a cache key that changes whenever the user's metrics are written."""
+
+    version = await data_version(METRICS_SCOPE, user_id)
+    suffix = ":".join(str(part) for part in parts)
+    return f"metrics:{user_id}:{version}:{suffix}"
+
+
+async def invalidate_user_metrics(user_ids: Iterable[int]) -> None:
+    await bump_data_version(METRICS_SCOPE, user_ids)
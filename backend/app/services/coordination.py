@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import AsyncIterator, Callable, List, Optional
+
+import asyncio
+import logging
+import time
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import get_settings
+from ..core.database import AsyncSessionLocal, insert_missing_rows
+from ..core.instrumentation import SYNC_RUN_DURATION
+from ..models.scheduling import SyncRun, SyncRunStatus, SyncWorkItem, WorkItemStatus
+from .leases import LeaseHeartbeat, acquire_lease, process_identity, release_lease
+from .sync_engine import SyncEngine, SyncRunStats, stream_user_ids
+
+logger = logging.getLogger(__name__)
+
+DAILY_SYNC_LEASE = "daily-sync"
+
+
+class SharedSyncRun:
+    """One day's sync split into per-user work items that any number of processes share.
+
+    The process holding the ``daily-sync`` lease enqueues one item per user,
+    renewing the lease while it does. If it dies, another process takes over
+    the lease once it expires and resumes after the last enqueued user. Every
+    process, leader included, claims items in small batches with
+    ``SELECT ... FOR UPDATE SKIP LOCKED`` on Postgres; on SQLite the claiming
+    ``UPDATE ... RETURNING`` is serialized by the database lock instead. Items
+    whose claim expires, because their worker died, are claimed again.
+    """
+
+    def __init__(
+        self,
+        metric_day: date,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        holder: Optional[str] = None,
+    ) -> None:
+        settings = get_settings()
+        self.metric_day = metric_day
+        self.session_factory = session_factory
+        self.holder = holder or process_identity()
+        self.lease_ttl = timedelta(seconds=settings.sync_lease_ttl_seconds)
+        self.claim_size = settings.sync_claim_batch_size
+        self.claim_ttl = timedelta(seconds=settings.sync_work_item_lease_seconds)
+        self.max_attempts = settings.sync_work_item_max_attempts
+        self.poll_interval = settings.sync_poll_interval_seconds
+        self.chunk_size = settings.sync_user_chunk_size
+
+    async def _get_run(self) -> Optional[SyncRun]:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(SyncRun).where(SyncRun.metric_date == self.metric_day)
+            )
+            return result.scalar_one_or_none()
+
+    async def _enqueue(self) -> None:
+        async with self.session_factory() as session:
+            await insert_missing_rows(
+                session, SyncRun, [{"metric_date": self.metric_day}], key_columns=("metric_date",)
+            )
+            await session.commit()
+        run = await self._get_run()
+        if run.status != SyncRunStatus.ENQUEUING:
+            async with self.session_factory() as session:
+                await release_lease(session, DAILY_SYNC_LEASE, self.holder)
+            return
+
+        async with LeaseHeartbeat(
+            self.session_factory, DAILY_SYNC_LEASE, self.holder, self.lease_ttl
+        ) as heartbeat:
+            async with self.session_factory() as session:
+                last_user_id = await session.scalar(
+                    select(func.max(SyncWorkItem.user_id)).where(SyncWorkItem.run_id == run.id)
+                )
+            async for chunk in stream_user_ids(
+                self.session_factory, self.chunk_size, after=last_user_id or 0
+            ):
+                if heartbeat.lost:
+                    return
+                async with self.session_factory() as session:
+                    await insert_missing_rows(
+                        session,
+                        SyncWorkItem,
+                        [{"run_id": run.id, "user_id": user_id} for user_id in chunk],
+                        key_columns=("run_id", "user_id"),
+                    )
+                    await session.commit()
+
+            async with self.session_factory() as session:
+                await session.execute(
+                    update(SyncRun)
+                    .where(SyncRun.id == run.id)
+                    .values(status=SyncRunStatus.ENQUEUED)
+                )
+                await session.commit()
+        logger.info("Enqueued sync of %s", self.metric_day.isoformat())
+
+    async def _claim(self, run_id: int) -> List[int]:
+        now = datetime.utcnow()
+        claimable = (
+            select(SyncWorkItem.id)
+            .where(
+                SyncWorkItem.run_id == run_id,
+                SyncWorkItem.attempts < self.max_attempts,
+                or_(
+                    SyncWorkItem.status == WorkItemStatus.PENDING,
+                    and_(
+                        SyncWorkItem.status == WorkItemStatus.CLAIMED,
+                        SyncWorkItem.claimed_until < now,
+                    ),
+                ),
+            )
+            .order_by(SyncWorkItem.id)
+            .limit(self.claim_size)
+            .with_for_update(skip_locked=True)
+        )
+        async with self.session_factory() as session:
+            result = await session.execute(
+                update(SyncWorkItem)
+                .where(SyncWorkItem.id.in_(claimable.scalar_subquery()))
+                .values(
+                    status=WorkItemStatus.CLAIMED,
+                    claimed_by=self.holder,
+                    claimed_until=now + self.claim_ttl,
+                    attempts=SyncWorkItem.attempts + 1,
+                )
+                .returning(SyncWorkItem.user_id)
+                .execution_options(synchronize_session=False)
+            )
+            user_ids = list(result.scalars().all())
+            await session.commit()
+        return user_ids
+
+    async def _open_items(self, run_id: int, include_own: bool) -> int:
+        condition = SyncWorkItem.status == WorkItemStatus.PENDING
+        claimed = SyncWorkItem.status == WorkItemStatus.CLAIMED
+        if not include_own:
+            claimed = and_(claimed, SyncWorkItem.claimed_by != self.holder)
+        async with self.session_factory() as session:
+            return await session.scalar(
+                select(func.count(SyncWorkItem.id)).where(
+                    SyncWorkItem.run_id == run_id,
+                    SyncWorkItem.attempts < self.max_attempts,
+                    or_(condition, claimed),
+                )
+            )
+
+    async def user_ids(self) -> AsyncIterator[List[int]]:
+        """Yield batches of claimed user ids until no work is left for this process."""
+
+        while True:
+            run = await self._get_run()
+            if run is None or run.status == SyncRunStatus.ENQUEUING:
+                async with self.session_factory() as session:
+                    leading = await acquire_lease(
+                        session, DAILY_SYNC_LEASE, self.holder, self.lease_ttl
+                    )
+                if leading:
+                    await self._enqueue()
+                    run = await self._get_run()
+            if run is None:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            if run.status == SyncRunStatus.FINISHED:
+                return
+
+            user_ids = await self._claim(run.id)
+            if user_ids:
+                yield user_ids
+                continue
+            # Items still claimed by this process are written when the engine finishes.
+            if run.status == SyncRunStatus.ENQUEUED and not await self._open_items(
+                run.id, include_own=False
+            ):
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    async def complete(self, session: AsyncSession, user_ids: List[int]) -> None:
+        """Mark the items of ``user_ids`` done within the transaction writing their metrics."""
+
+        if not user_ids:
+            return
+        await session.execute(
+            update(SyncWorkItem)
+            .where(
+                SyncWorkItem.run_id == select(SyncRun.id)
+                .where(SyncRun.metric_date == self.metric_day)
+                .scalar_subquery(),
+                SyncWorkItem.user_id.in_(user_ids),
+            )
+            .values(status=WorkItemStatus.DONE, claimed_until=None)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def finish_if_done(self) -> None:
+        run = await self._get_run()
+        if run is None or run.status != SyncRunStatus.ENQUEUED:
+            return
+        if await self._open_items(run.id, include_own=True):
+            return
+        async with self.session_factory() as session:
+            await session.execute(
+                update(SyncRun)
+                .where(SyncRun.id == run.id, SyncRun.status == SyncRunStatus.ENQUEUED)
+                .values(status=SyncRunStatus.FINISHED, finished_at=datetime.utcnow())
+            )
+            await session.commit()
+
+
+async def run_shared_sync(metric_day: date) -> SyncRunStats:
+    """Take part in the shared sync of ``metric_day`` alongside every other process."""
+
+    started = time.perf_counter()
+    shared = SharedSyncRun(metric_day)
+    engine = SyncEngine(
+        # Claimed items are written before their claim can expire.
+        write_batch_size=shared.claim_size,
+        user_source=shared.user_ids(),
+        on_commit=shared.complete,
+    )
+    try:
+        stats = await engine.run(metric_day)
+        await shared.finish_if_done()
+    finally:
+        SYNC_RUN_DURATION.observe(time.perf_counter() - started)
+    return stats
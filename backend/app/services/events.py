@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, AsyncContextManager, AsyncIterator, Dict, Iterable, Optional, Set, Tuple
+
+import asyncio
+import json
+import logging
+
+from ..core.config import get_settings
+from ..core.serialization import dumps
+from ..models.notification import SyncNotification
+from .cache import invalidate_user_metrics
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_EVENT = "notification"
+METRICS_EVENT = "metrics"
+SYNC_JOB_EVENT = "sync_job"
+SYNC_JOB_PROGRESS_EVENT = "sync_job_progress"
+
+# (event name, JSON-encoded data)
+Event = Tuple[str, bytes]
+
+
+class EventBus(ABC):
+    """Interface of the pub/sub that carries per-user events to open ``/events`` streams."""
+
+    @abstractmethod
+    async def publish(self, user_ids: Iterable[int], event: str, data: Any) -> None:
+        ...
+
+    @abstractmethod
+    def subscribe(self, user_id: int) -> "AsyncContextManager[asyncio.Queue[Event]]":
+        """``async with`` a queue receiving the user's events until the block exits."""
+
+
+class MemoryEventBus(EventBus):
+    """Delivers events to the streams open in this process only.
+
+    Each stream has a bounded queue; when a client does not keep up its oldest
+    pending event is dropped.
+    """
+
+    def __init__(self, queue_size: int) -> None:
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set["asyncio.Queue[Event]"]] = {}
+
+    def _deliver(self, user_id: int, event: Event) -> None:
+        for queue in self._subscribers.get(user_id, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def publish(self, user_ids: Iterable[int], event: str, data: Any) -> None:
+        encoded = dumps(data)
+        for user_id in set(user_ids):
+            self._deliver(user_id, (event, encoded))
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: int) -> AsyncIterator["asyncio.Queue[Event]"]:
+        queue: "asyncio.Queue[Event]" = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+
+class RedisEventBus(MemoryEventBus):
+    """Shares events between processes through one Redis pub/sub channel.
+
+    Each process listens on the channel with a single connection, opened with
+    the first stream, and hands the events to its own streams.
+    """
+
+    CHANNEL = "events"
+
+    def __init__(self, url: str, queue_size: int) -> None:
+        super().__init__(queue_size)
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError("EVENTS_BACKEND=redis requires the 'redis' package") from exc
+
+        self._client = redis_asyncio.from_url(url)
+        self._listener: Optional[asyncio.Task] = None
+
+    async def publish(self, user_ids: Iterable[int], event: str, data: Any) -> None:
+        message = {"user_ids": sorted(set(user_ids)), "event": event, "data": data}
+        await self._client.publish(self.CHANNEL, dumps(message))
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self._client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        payload = json.loads(message["data"])
+                        encoded = dumps(payload["data"])
+                        for user_id in payload["user_ids"]:
+                            self._deliver(user_id, (payload["event"], encoded))
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # noqa: BLE001
+                logger.exception("Event listener lost its Redis connection")
+                await asyncio.sleep(1)
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: int) -> AsyncIterator["asyncio.Queue[Event]"]:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        async with super().subscribe(user_id) as queue:
+            yield queue
+
+
+@lru_cache()
+def get_event_bus() -> EventBus:
+    settings = get_settings()
+    if settings.events_backend == "redis":
+        url = settings.events_url or settings.cache_url
+        if not url:
+            raise RuntimeError("EVENTS_BACKEND=redis requires EVENTS_URL or CACHE_URL")
+        return RedisEventBus(url, settings.events_queue_size)
+    return MemoryEventBus(settings.events_queue_size)
+
+
+async def publish_event(user_ids: Iterable[int], event: str, data: Any) -> None:
+    """Publish without ever failing the caller, whose data is already committed."""
+
+    try:
+        await get_event_bus().publish(user_ids, event, data)
+    except Exception:  # noqa: BLE001
+        logger.exception("Could not publish %s event", event)
+
+
+async def publish_notification(notification: SyncNotification) -> None:
+    await publish_event(
+        [notification.user_id],
+        NOTIFICATION_EVENT,
+        {
+            "id": notification.id,
+            "level": notification.level.value,
+            "message": notification.message,
+            "is_read": notification.is_read,
+            "created_at": notification.created_at,
+        },
+    )
+
+
+async def metrics_updated(user_ids: Iterable[int]) -> None:
+    """Invalidate the users' cached metrics and tell their open streams to reload them."""
+
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    await invalidate_user_metrics(user_ids)
+    await publish_event(user_ids, METRICS_EVENT, {})
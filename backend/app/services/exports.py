@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from datetime import date
+from enum import Enum
+from typing import AsyncIterator, Iterable, List, Sequence, Tuple
+
+import csv
+import io
+import zlib
+
+from sqlalchemy import Select, and_, select
+
+from ..core.database import AsyncSessionLocal
+from ..core.serialization import dumps
+from ..models.integration import IntegrationAccount
+from ..models.metrics import DailyMetric, IntegrationDailyMetric
+from .metrics import calculate_roi
+
+EXPORT_COLUMNS = ("metric_date", "spend", "revenue", "roi")
+BREAKDOWN_COLUMNS = ("metric_date", "integration_id", "integration_type", "spend", "revenue", "roi")
+ROWS_PER_CHUNK = 1000
+
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+def _totals_query(user_id: int, start: date, end: date) -> Select:
+    return (
+        select(
+            DailyMetric.metric_date,
+            DailyMetric.spend,
+            DailyMetric.revenue,
+            DailyMetric.roi,
+        )
+        .where(
+            and_(
+                DailyMetric.user_id == user_id,
+                DailyMetric.metric_date >= start,
+                DailyMetric.metric_date <= end,
+            )
+        )
+        .order_by(DailyMetric.metric_date)
+    )
+
+
+def _breakdown_query(user_id: int, start: date, end: date) -> Select:
+    return (
+        select(
+            IntegrationDailyMetric.metric_date,
+            IntegrationDailyMetric.integration_id,
+            IntegrationAccount.type,
+            IntegrationDailyMetric.spend,
+            IntegrationDailyMetric.revenue,
+        )
+        .join(IntegrationAccount, IntegrationAccount.id == IntegrationDailyMetric.integration_id)
+        .where(
+            and_(
+                IntegrationDailyMetric.user_id == user_id,
+                IntegrationDailyMetric.metric_date >= start,
+                IntegrationDailyMetric.metric_date <= end,
+            )
+        )
+        .order_by(IntegrationDailyMetric.metric_date, IntegrationDailyMetric.integration_id)
+    )
+
+
+def _breakdown_row(row: Sequence) -> Tuple:
+    metric_date, integration_id, integration_type, spend, revenue = row
+    return (
+        metric_date,
+        integration_id,
+        integration_type.value,
+        spend,
+        revenue,
+        calculate_roi(spend, revenue),
+    )
+
+
+async def _stream_rows(query: Select) -> AsyncIterator[List[Sequence]]:
+    """Yield lists of rows read through a server-side cursor.
+
+    The export outlives the request's dependencies, so it opens its own session.
+    """
+
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(query.execution_options(yield_per=ROWS_PER_CHUNK))
+        async for partition in result.partitions():
+            yield partition
+
+
+def _encode_csv(rows: Iterable[Sequence], columns: Sequence[str], header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    for row in rows:
+        writer.writerow((row[0].isoformat(), *row[1:]))
+    return buffer.getvalue().encode("utf-8")
+
+
+def _encode_ndjson(rows: Iterable[Sequence], columns: Sequence[str]) -> bytes:
+    return b"".join(dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+
+
+async def export_metrics(
+    user_id: int,
+    start: date,
+    end: date,
+    export_format: ExportFormat,
+    compress: bool = False,
+    breakdown: bool = False,
+) -> AsyncIterator[bytes]:
+    """Yield the encoded export chunk by chunk, optionally gzip-compressed on the fly.
+
+    With ``breakdown`` there is one row per integration and day instead of the
+    user's daily totals.
+    """
+
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+    first = True
+    if breakdown:
+        query, columns = _breakdown_query(user_id, start, end), BREAKDOWN_COLUMNS
+    else:
+        query, columns = _totals_query(user_id, start, end), EXPORT_COLUMNS
+
+    async for rows in _stream_rows(query):
+        if breakdown:
+            rows = [_breakdown_row(row) for row in rows]
+        if export_format == ExportFormat.CSV:
+            chunk = _encode_csv(rows, columns, header=first)
+        else:
+            chunk = _encode_ndjson(rows, columns)
+        first = False
+        if compressor is not None:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+
+    tail = b""
+    if first and export_format == ExportFormat.CSV:
+        tail = _encode_csv([], columns, header=True)
+    if compressor is not None:
+        tail = compressor.compress(tail) + compressor.flush()
+    if tail:
+        yield tail
@@ -4,8 +4,58 @@ from datetime import date
 from typing import Dict, Optional
 
 import json
+import httpx
 import requests
 
+from .http import get_http_client
+from .rate_limit import FacebookRateLimiter, get_facebook_rate_limiter
+from .resilience import retry_transient
+
+GRAPH_HOST = "graph.facebook.com"
+REVENUE_ACTION_TYPES = {"offsite_conversion", "offsite_conversion.purchase"}
+
+
+def _insights_params(start: date, end: date, business_id: Optional[str]) -> Dict[str, str]:
+    params: Dict[str, str] = {
+        "time_range": json.dumps({"since": start.isoformat(), "until": end.isoformat()}),
+        "time_increment": "1",
+        "fields": "spend,actions",  # include purchase actions for revenue estimation
+    }
+    if business_id:
+        params["business_id"] = business_id
+    return params
+
+
+def _parse_insights_entry(entry: Dict) -> Dict[str, float]:
+    spend = float(entry.get("spend", 0.0))
+    revenue = 0.0
+    for action in entry.get("actions", []) or []:
+        if action.get("action_type") in REVENUE_ACTION_TYPES:
+            revenue += float(action.get("value", 0.0))
+    return {"spend": spend, "revenue": revenue}
+
+
+def _graph_url(api_version: str) -> str:
+    return f"https://{GRAPH_HOST}/{api_version}"
+
+
+def _insights_path(account_id: str) -> str:
+    return f"act_{account_id}/insights"
+
+
+def _check_payload(payload: Dict) -> Dict:
+    if "error" in payload:
+        raise RuntimeError(payload["error"])  # type: ignore[arg-type]
+    return payload
+
+
+def _collect_insights(payload: Dict, into: Dict[date, Dict[str, float]]) -> Optional[str]:
+    """Add the per-day rows of an insights page to ``into``; return the next page URL."""
+
+    for entry in payload.get("data", []):
+        into[date.fromisoformat(entry["date_start"])] = _parse_insights_entry(entry)
+    return (payload.get("paging") or {}).get("next")
+
 
 class FacebookAdsClient:
     """Minimal client for retrieving daily spend from the Facebook Marketing API."""
@@ -21,7 +71,7 @@ class FacebookAdsClient:
         self.account_id = account_id
         self.api_version = api_version
         self.business_id = business_id
-        self.base_url = f"https://graph.facebook.com/{api_version}"
+        self.base_url = _graph_url(api_version)
 
     def _request(self, path: str, params: Dict[str, str]) -> Dict:
         response = requests.get(
@@ -30,31 +80,86 @@ class FacebookAdsClient:
             timeout=30,
         )
         response.raise_for_status()
-        payload = response.json()
-        if "error" in payload:
-            raise RuntimeError(payload["error"])  # type: ignore[arg-type]
-        return payload
+        return _check_payload(response.json())
 
     def fetch_daily_metrics(self, day: date) -> Dict[str, float]:
         """Return spend and revenue approximation for a specific day."""
 
-        params: Dict[str, str] = {
-            "time_range": json.dumps({"since": day.isoformat(), "until": day.isoformat()}),
-            "time_increment": "1",
-            "fields": "spend,actions",  # include purchase actions for revenue estimation
-        }
-        if self.business_id:
-            params["business_id"] = self.business_id
-
-        payload = self._request(f"act_{self.account_id}/insights", params)
-        data = payload.get("data", [])
-        if not data:
-            return {"spend": 0.0, "revenue": 0.0}
-
-        entry = data[0]
-        spend = float(entry.get("spend", 0.0))
-        revenue = 0.0
-        for action in entry.get("actions", []) or []:
-            if action.get("action_type") in {"offsite_conversion", "offsite_conversion.purchase"}:
-                revenue += float(action.get("value", 0.0))
-        return {"spend": spend, "revenue": revenue}
+        return self.fetch_metrics_range(day, day).get(day, {"spend": 0.0, "revenue": 0.0})
+
+    def fetch_metrics_range(self, start: date, end: date) -> Dict[date, Dict[str, float]]:
+        """Return spend and revenue per day for ``start``..``end`` (inclusive).
+
+        Days without delivery are absent from the result.
+        """
+
+        metrics: Dict[date, Dict[str, float]] = {}
+        payload = self._request(
+            _insights_path(self.account_id), _insights_params(start, end, self.business_id)
+        )
+        next_url = _collect_insights(payload, metrics)
+        while next_url:
+            response = requests.get(next_url, timeout=30)
+            response.raise_for_status()
+            next_url = _collect_insights(response.json(), metrics)
+        return metrics
+
+
+class AsyncFacebookAdsClient:
+    """Async counterpart of :class:`FacebookAdsClient` backed by the shared Graph API pool."""
+
+    def __init__(
+        self,
+        access_token: str,
+        account_id: str,
+        api_version: str = "v18.0",
+        business_id: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        rate_limiter: Optional[FacebookRateLimiter] = None,
+    ) -> None:
+        self.access_token = access_token
+        self.account_id = account_id
+        self.api_version = api_version
+        self.business_id = business_id
+        self.base_url = _graph_url(api_version)
+        self.http_client = http_client or get_http_client(GRAPH_HOST)
+        self.rate_limiter = rate_limiter or get_facebook_rate_limiter()
+
+    async def _get(self, url: str, params: Optional[Dict[str, str]] = None) -> httpx.Response:
+        async def attempt() -> httpx.Response:
+            await self.rate_limiter.acquire(self.account_id)
+            response = await self.http_client.get(url, params=params)
+            self.rate_limiter.observe(self.account_id, response.headers)
+            response.raise_for_status()
+            return response
+
+        return await retry_transient(attempt)
+
+    async def _request(self, path: str, params: Dict[str, str]) -> Dict:
+        response = await self._get(
+            f"{self.base_url}/{path}",
+            params={**params, "access_token": self.access_token},
+        )
+        return _check_payload(response.json())
+
+    async def fetch_daily_metrics(self, day: date) -> Dict[str, float]:
+        """Return spend and revenue approximation for a specific day."""
+
+        metrics = await self.fetch_metrics_range(day, day)
+        return metrics.get(day, {"spend": 0.0, "revenue": 0.0})
+
+    async def fetch_metrics_range(self, start: date, end: date) -> Dict[date, Dict[str, float]]:
+        """Return spend and revenue per day for ``start``..``end`` (inclusive).
+
+        Days without delivery are absent from the result.
+        """
+
+        metrics: Dict[date, Dict[str, float]] = {}
+        payload = await self._request(
+            _insights_path(self.account_id), _insights_params(start, end, self.business_id)
+        )
+        next_url = _collect_insights(payload, metrics)
+        while next_url:
+            response = await self._get(next_url)
+            next_url = _collect_insights(response.json(), metrics)
+        return metrics
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import and_, delete, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import get_settings
+from ..core.database import upsert_rows
+from ..models.integration import IntegrationAccount, IntegrationSyncState, IntegrationType
+from ..models.metrics import IntegrationDailyMetric
+
+DateRange = Tuple[date, date]
+# integration_id -> contiguous ranges of days still to fetch
+FetchPlan = Dict[int, List[DateRange]]
+
+
+def date_range(start: date, end: date) -> List[date]:
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+
+def contiguous_ranges(days: Iterable[date]) -> List[DateRange]:
+    ranges: List[DateRange] = []
+    for day in sorted(set(days)):
+        if ranges and ranges[-1][1] + timedelta(days=1) == day:
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+
+def attribution_window(integration_type: IntegrationType) -> timedelta:
+    """How long after a day the provider may still change that day's values."""
+
+    settings = get_settings()
+    if integration_type == IntegrationType.FACEBOOK:
+        return timedelta(days=settings.facebook_attribution_window_days)
+    return timedelta(days=settings.adsense_attribution_window_days)
+
+
+def max_attribution_window() -> timedelta:
+    return max(attribution_window(integration_type) for integration_type in IntegrationType)
+
+
+def is_settled(day: date, synced_at: datetime, window: timedelta) -> bool:
+    """Whether a value fetched at ``synced_at`` is final for ``day``."""
+
+    return synced_at.date() - day > window
+
+
+def _within(state: Optional[IntegrationSyncState], day: date) -> bool:
+    return (
+        state is not None
+        and state.settled_from is not None
+        and state.settled_from <= day <= state.settled_through
+    )
+
+
+async def _load_states(
+    session: AsyncSession, integration_ids: Iterable[int]
+) -> Dict[int, IntegrationSyncState]:
+    result = await session.execute(
+        select(IntegrationSyncState).where(
+            IntegrationSyncState.integration_id.in_(set(integration_ids))
+        )
+    )
+    return {state.integration_id: state for state in result.scalars().all()}
+
+
+async def plan_fetches(
+    session: AsyncSession, integrations: Sequence[IntegrationAccount], start: date, end: date
+) -> FetchPlan:
+    """Return, per integration, the days of ``start``..``end`` that are not settled yet.
+
+    Days inside an integration's watermark are skipped without reading them;
+    the others are skipped only if their stored value was fetched after the
+    attribution window had closed. Integrations with nothing to fetch are left
+    out of the plan.
+    """
+
+    if not integrations:
+        return {}
+
+    states = await _load_states(session, (integration.id for integration in integrations))
+    candidates = {
+        integration.id: [
+            day for day in date_range(start, end) if not _within(states.get(integration.id), day)
+        ]
+        for integration in integrations
+    }
+
+    settled: Set[Tuple[int, date]] = set()
+    unresolved = [integration_id for integration_id, days in candidates.items() if days]
+    if unresolved:
+        windows = {integration.id: attribution_window(integration.type) for integration in integrations}
+        result = await session.execute(
+            select(
+                IntegrationDailyMetric.integration_id,
+                IntegrationDailyMetric.metric_date,
+                IntegrationDailyMetric.synced_at,
+            ).where(
+                IntegrationDailyMetric.integration_id.in_(unresolved),
+                IntegrationDailyMetric.metric_date >= start,
+                IntegrationDailyMetric.metric_date <= end,
+            )
+        )
+        for integration_id, day, synced_at in result.all():
+            if is_settled(day, synced_at, windows[integration_id]):
+                settled.add((integration_id, day))
+
+    plan: FetchPlan = {}
+    for integration_id, days in candidates.items():
+        ranges = contiguous_ranges(day for day in days if (integration_id, day) not in settled)
+        if ranges:
+            plan[integration_id] = ranges
+    return plan
+
+
+def full_plan(integrations: Iterable[IntegrationAccount], start: date, end: date) -> FetchPlan:
+    return {integration.id: [(start, end)] for integration in integrations}
+
+
+async def advance_watermarks(session: AsyncSession, integration_ids: Iterable[int]) -> None:
+    """Grow each integration's settled range over adjacent days whose values are final.
+
+    An integration without a watermark starts from its most recent block of
+    settled days. The caller is responsible for committing.
+    """
+
+    integration_ids = set(integration_ids)
+    if not integration_ids:
+        return
+
+    result = await session.execute(
+        select(IntegrationAccount.id, IntegrationAccount.type).where(
+            IntegrationAccount.id.in_(integration_ids)
+        )
+    )
+    windows = {integration_id: attribution_window(kind) for integration_id, kind in result.all()}
+    if not windows:
+        return
+    states = await _load_states(session, windows)
+
+    outside = []
+    for integration_id in windows:
+        state = states.get(integration_id)
+        condition = IntegrationDailyMetric.integration_id == integration_id
+        if state is not None and state.settled_from is not None:
+            condition = and_(
+                condition,
+                or_(
+                    IntegrationDailyMetric.metric_date < state.settled_from,
+                    IntegrationDailyMetric.metric_date > state.settled_through,
+                ),
+            )
+        outside.append(condition)
+    result = await session.execute(
+        select(
+            IntegrationDailyMetric.integration_id,
+            IntegrationDailyMetric.metric_date,
+            IntegrationDailyMetric.synced_at,
+        ).where(or_(*outside))
+    )
+    final: Dict[int, Set[date]] = {}
+    for integration_id, day, synced_at in result.all():
+        if is_settled(day, synced_at, windows[integration_id]):
+            final.setdefault(integration_id, set()).add(day)
+
+    now = datetime.utcnow()
+    values = []
+    for integration_id in windows:
+        state = states.get(integration_id)
+        days = final.get(integration_id, set())
+        if state is not None and state.settled_from is not None:
+            low, high = state.settled_from, state.settled_through
+        elif days:
+            low, high = contiguous_ranges(days)[-1]
+        else:
+            low = high = None
+
+        if low is not None:
+            while high + timedelta(days=1) in days:
+                high += timedelta(days=1)
+            while low - timedelta(days=1) in days:
+                low -= timedelta(days=1)
+        values.append(
+            {
+                "integration_id": integration_id,
+                "settled_from": low,
+                "settled_through": high,
+                "last_synced_at": now,
+            }
+        )
+
+    await upsert_rows(session, IntegrationSyncState, values, key_columns=("integration_id",))
+
+
+async def reset_sync_state(session: AsyncSession, integration_id: int) -> None:
+    """Forget what is settled for an integration, e.g. after its account changed."""
+
+    await session.execute(
+        delete(IntegrationSyncState).where(IntegrationSyncState.integration_id == integration_id)
+    )
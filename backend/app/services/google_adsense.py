@@ -1,16 +1,93 @@
 from __future__ import annotations
 
 from datetime import date, datetime, timedelta, timezone
-from typing import Dict
+from typing import Any, Dict, Optional
 
+import httpx
 import requests
 
+from .http import get_http_client
+from .rate_limit import FixedRateLimiter, get_adsense_rate_limiter
+from .resilience import retry_transient
+
+ADSENSE_HOST = "adsense.googleapis.com"
+OAUTH_HOST = "oauth2.googleapis.com"
+ADSENSE_BASE_URL = f"https://{ADSENSE_HOST}/v2"
+TOKEN_URL = f"https://{OAUTH_HOST}/token"
+
+
+class AdSenseUnauthorizedError(Exception):
+    """Raised when the API responds with an authorization error."""
+
+
+def _report_url(base_url: str, account_id: str) -> str:
+    return f"{base_url}/{account_id}/reports:generate"
+
+
+def _auth_headers(access_token: str) -> Dict[str, str]:
+    return {
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json",
+    }
+
+
+def _report_payload(start: date, end: date, by_date: bool = False) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {
+        "dateRange": {
+            "startDate": start.isoformat(),
+            "endDate": end.isoformat(),
+        },
+        "metrics": ["ESTIMATED_EARNINGS"],
+        "timeZone": "UTC",
+    }
+    if by_date:
+        payload["dimensions"] = ["DATE"]
+    return payload
+
+
+def _parse_earnings(data: Dict[str, Any]) -> float:
+    rows = data.get("rows", [])
+    if not rows:
+        return 0.0
+    first_row = rows[0]
+    cells = first_row.get("cells", [])
+    if not cells:
+        return 0.0
+    return float(cells[0].get("value", 0.0))
+
+
+def _parse_earnings_by_date(data: Dict[str, Any]) -> Dict[date, float]:
+    earnings: Dict[date, float] = {}
+    for row in data.get("rows", []):
+        cells = row.get("cells", [])
+        if len(cells) < 2:
+            continue
+        earnings[date.fromisoformat(cells[0]["value"])] = float(cells[1].get("value", 0.0))
+    return earnings
+
+
+def _refresh_form(client_id: str, client_secret: str, refresh_token: str) -> Dict[str, str]:
+    return {
+        "client_id": client_id,
+        "client_secret": client_secret,
+        "refresh_token": refresh_token,
+        "grant_type": "refresh_token",
+    }
+
+
+def _parse_token(payload: Dict[str, Any]) -> Dict[str, str]:
+    expires_in = int(payload.get("expires_in", 3600))
+    expiry = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
+    return {
+        "access_token": payload["access_token"],
+        "token_expiry": expiry.isoformat(),
+    }
+
 
 class GoogleAdSenseClient:
     """Lightweight client for pulling earnings reports from the AdSense Management API."""
 
-    class UnauthorizedError(Exception):
-        """Raised when the API responds with an authorization error."""
+    UnauthorizedError = AdSenseUnauthorizedError
 
     def __init__(
         self,
@@ -19,27 +96,12 @@ class GoogleAdSenseClient:
     ) -> None:
         self.account_id = account_id
         self.access_token = access_token
-        self.base_url = "https://adsense.googleapis.com/v2"
-
-    def _headers(self) -> Dict[str, str]:
-        return {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json",
-        }
-
-    def fetch_daily_earnings(self, day: date) -> float:
-        payload = {
-            "dateRange": {
-                "startDate": day.isoformat(),
-                "endDate": day.isoformat(),
-            },
-            "metrics": ["ESTIMATED_EARNINGS"],
-            "timeZone": "UTC",
-        }
+        self.base_url = ADSENSE_BASE_URL
 
+    def _generate_report(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         response = requests.post(
-            f"{self.base_url}/{self.account_id}/reports:generate",
-            headers=self._headers(),
+            _report_url(self.base_url, self.account_id),
+            headers=_auth_headers(self.access_token),
             json=payload,
             timeout=30,
         )
@@ -47,37 +109,90 @@ class GoogleAdSenseClient:
             response.raise_for_status()
         except requests.HTTPError as error:
             if response.status_code in {401, 403}:
-                raise GoogleAdSenseClient.UnauthorizedError from error
+                raise AdSenseUnauthorizedError from error
             raise
-        data = response.json()
-        rows = data.get("rows", [])
-        if not rows:
-            return 0.0
-        first_row = rows[0]
-        cells = first_row.get("cells", [])
-        if not cells:
-            return 0.0
-        return float(cells[0].get("value", 0.0))
+        return response.json()
+
+    def fetch_daily_earnings(self, day: date) -> float:
+        return _parse_earnings(self._generate_report(_report_payload(day, day)))
+
+    def fetch_earnings_range(self, start: date, end: date) -> Dict[date, float]:
+        """Return estimated earnings per day for ``start``..``end`` (inclusive)."""
+
+        return _parse_earnings_by_date(
+            self._generate_report(_report_payload(start, end, by_date=True))
+        )
 
     @staticmethod
     def refresh_access_token(
         client_id: str, client_secret: str, refresh_token: str
     ) -> Dict[str, str]:
         response = requests.post(
-            "https://oauth2.googleapis.com/token",
-            data={
-                "client_id": client_id,
-                "client_secret": client_secret,
-                "refresh_token": refresh_token,
-                "grant_type": "refresh_token",
-            },
+            TOKEN_URL,
+            data=_refresh_form(client_id, client_secret, refresh_token),
             timeout=30,
         )
         response.raise_for_status()
-        payload = response.json()
-        expires_in = int(payload.get("expires_in", 3600))
-        expiry = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
-        return {
-            "access_token": payload["access_token"],
-            "token_expiry": expiry.isoformat(),
-        }
+        return _parse_token(response.json())
+
+
+class AsyncGoogleAdSenseClient:
+    """Async counterpart of :class:`GoogleAdSenseClient` backed by the shared AdSense pool."""
+
+    UnauthorizedError = AdSenseUnauthorizedError
+
+    def __init__(
+        self,
+        account_id: str,
+        access_token: str,
+        http_client: Optional[httpx.AsyncClient] = None,
+        rate_limiter: Optional[FixedRateLimiter] = None,
+    ) -> None:
+        self.account_id = account_id
+        self.access_token = access_token
+        self.base_url = ADSENSE_BASE_URL
+        self.http_client = http_client or get_http_client(ADSENSE_HOST)
+        self.rate_limiter = rate_limiter or get_adsense_rate_limiter()
+
+    async def _generate_report(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        async def attempt() -> httpx.Response:
+            await self.rate_limiter.acquire()
+            response = await self.http_client.post(
+                _report_url(self.base_url, self.account_id),
+                headers=_auth_headers(self.access_token),
+                json=payload,
+            )
+            self.rate_limiter.observe(response.status_code, response.headers)
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError as error:
+                if response.status_code in {401, 403}:
+                    raise AdSenseUnauthorizedError from error
+                raise
+            return response
+
+        return (await retry_transient(attempt)).json()
+
+    async def fetch_daily_earnings(self, day: date) -> float:
+        return _parse_earnings(await self._generate_report(_report_payload(day, day)))
+
+    async def fetch_earnings_range(self, start: date, end: date) -> Dict[date, float]:
+        """Return estimated earnings per day for ``start``..``end`` (inclusive)."""
+
+        return _parse_earnings_by_date(
+            await self._generate_report(_report_payload(start, end, by_date=True))
+        )
+
+    @staticmethod
+    async def refresh_access_token(
+        client_id: str, client_secret: str, refresh_token: str
+    ) -> Dict[str, str]:
+        async def attempt() -> httpx.Response:
+            response = await get_http_client(OAUTH_HOST).post(
+                TOKEN_URL,
+                data=_refresh_form(client_id, client_secret, refresh_token),
+            )
+            response.raise_for_status()
+            return response
+
+        return _parse_token((await retry_transient(attempt)).json())
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from typing import Dict
+
+import time
+
+import httpx
+
+from ..core.config import get_settings
+from ..core.instrumentation import PROVIDER_REQUEST_DURATION, PROVIDER_REQUESTS, PROVIDER_THROTTLED
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+_request_count = 0
+
+
+def provider_request_count() -> int:
+    """Total number of provider requests sent by this process."""
+
+    return _request_count
+
+
+async def _count_request(request: httpx.Request) -> None:
+    global _request_count
+    _request_count += 1
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Record latency, outcome and throttling of every request sent to ``host``.
+
+    Wraps the transport rather than using event hooks so timeouts and
+    connection errors are counted too.
+    """
+
+    def __init__(self, host: str, transport: httpx.AsyncBaseTransport) -> None:
+        self.host = host
+        self._transport = transport
+        self._duration = PROVIDER_REQUEST_DURATION.labels(host)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception:
+            self._duration.observe(time.perf_counter() - started)
+            PROVIDER_REQUESTS.labels(self.host, "error").inc()
+            raise
+        self._duration.observe(time.perf_counter() - started)
+        PROVIDER_REQUESTS.labels(self.host, f"{response.status_code // 100}xx").inc()
+        if response.status_code == 429:
+            PROVIDER_THROTTLED.labels(self.host, "429").inc()
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def get_http_client(host: str) -> httpx.AsyncClient:
+    """Return the shared keep-alive connection pool for a provider host."""
+
+    client = _clients.get(host)
+    if client is None or client.is_closed:
+        settings = get_settings()
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=settings.http_pool_max_connections,
+                max_keepalive_connections=settings.http_pool_max_keepalive,
+                keepalive_expiry=settings.http_keepalive_expiry_seconds,
+            ),
+        )
+        client = httpx.AsyncClient(
+            transport=InstrumentedTransport(host, transport),
+            timeout=httpx.Timeout(
+                settings.http_timeout_seconds,
+                connect=settings.http_connect_timeout_seconds,
+            ),
+            event_hooks={"request": [_count_request]},
+        )
+        _clients[host] = client
+    return client
+
+
+async def close_http_clients() -> None:
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
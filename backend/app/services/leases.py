@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Callable, Optional
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+
+from sqlalchemy import delete, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.database import insert_missing_rows
+from ..models.scheduling import SchedulerLease
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache()
+def process_identity() -> str:
+    """Identify this process among every process sharing the database."""
+
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+async def acquire_lease(session: AsyncSession, name: str, holder: str, ttl: timedelta) -> bool:
+    """Take or renew lease ``name`` for ``holder``; fails while another holder's lease is live.
+
+    Commits on its own.
+    """
+
+    now = datetime.utcnow()
+    result = await session.execute(
+        update(SchedulerLease)
+        .where(
+            SchedulerLease.name == name,
+            or_(SchedulerLease.holder == holder, SchedulerLease.expires_at < now),
+        )
+        .values(holder=holder, expires_at=now + ttl, heartbeat_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    acquired = result.rowcount > 0
+    if not acquired:
+        acquired = (
+            await insert_missing_rows(
+                session,
+                SchedulerLease,
+                [{"name": name, "holder": holder, "expires_at": now + ttl, "heartbeat_at": now}],
+                key_columns=("name",),
+            )
+            > 0
+        )
+    await session.commit()
+    return acquired
+
+
+async def release_lease(session: AsyncSession, name: str, holder: str) -> None:
+    await session.execute(
+        delete(SchedulerLease).where(SchedulerLease.name == name, SchedulerLease.holder == holder)
+    )
+    await session.commit()
+
+
+class LeaseHeartbeat:
+    """Renew a held lease in the background; ``lost`` turns true if it is taken over.
+
+    Use as ``async with`` around the work that requires the lease, which is
+    released on exit. Subclasses renew other kinds of claims by overriding
+    :meth:`renew` and :meth:`release`.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        name: str,
+        holder: str,
+        ttl: timedelta,
+    ) -> None:
+        self.session_factory = session_factory
+        self.name = name
+        self.holder = holder
+        self.ttl = ttl
+        self.lost = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def _beat(self) -> None:
+        while True:
+            await asyncio.sleep(self.ttl.total_seconds() / 3)
+            try:
+                async with self.session_factory() as session:
+                    renewed = await self.renew(session)
+            except Exception:  # noqa: BLE001
+                logger.exception("Could not renew lease %s", self.name)
+                continue
+            if not renewed:
+                logger.warning("Lease %s was taken over by another process", self.name)
+                self.lost = True
+                return
+
+    async def renew(self, session: AsyncSession) -> bool:
+        """Extend the claim for another ``ttl``; return whether it was still held."""
+
+        return await acquire_lease(session, self.name, self.holder, self.ttl)
+
+    async def release(self, session: AsyncSession) -> None:
+        await release_lease(session, self.name, self.holder)
+
+    async def __aenter__(self) -> "LeaseHeartbeat":
+        self._task = asyncio.create_task(self._beat())
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if not self.lost:
+            async with self.session_factory() as session:
+                await self.release(session)
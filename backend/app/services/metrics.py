@@ -1,16 +1,32 @@
 from __future__ import annotations
 
-from datetime import date, datetime, timedelta, timezone
-from typing import Dict, Iterable, Optional
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
 
 import asyncio
-from sqlalchemy import and_, select
+import httpx
+from sqlalchemy import and_, delete, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..core.config import get_settings
+from ..core.database import upsert_rows
 from ..models.integration import IntegrationAccount, IntegrationType
-from ..models.metrics import DailyMetric
-from .facebook import FacebookAdsClient
-from .google_adsense import GoogleAdSenseClient
+from ..models.metrics import DailyMetric, IntegrationDailyMetric, MetricGranularity
+from .cache import INTEGRATIONS_SCOPE, bump_data_version
+from .events import metrics_updated
+from .facebook import AsyncFacebookAdsClient
+from .freshness import (
+    FetchPlan,
+    advance_watermarks,
+    date_range,
+    full_plan,
+    plan_fetches,
+    reset_sync_state,
+)
+from .google_adsense import AdSenseUnauthorizedError, AsyncGoogleAdSenseClient
+from .resilience import get_circuit_breaker
+from .rollups import list_rollups, period_end, period_start, refresh_rollups
+from .tokens import get_token_manager
 
 
 async def get_integrations(
@@ -29,144 +45,440 @@ def calculate_roi(spend: float, revenue: float) -> float:
     return (revenue - spend) / spend
 
 
-async def upsert_metric(
-    session: AsyncSession,
-    user_id: int,
-    metric_day: date,
-    spend: float,
-    revenue: float,
-) -> DailyMetric:
-    roi = calculate_roi(spend, revenue)
+# (user_id, metric_date, spend, revenue)
+MetricRow = Tuple[int, date, float, float]
+
+
+async def bulk_upsert_metrics(session: AsyncSession, rows: Iterable[MetricRow]) -> None:
+    """Insert or update many daily metrics, several rows per statement.
+
+    Uses ``INSERT ... ON CONFLICT (user_id, metric_date) DO UPDATE`` on SQLite and
+    Postgres and falls back to a per-row select and update elsewhere. Affected
+    rollups are refreshed. The caller is responsible for committing.
+    """
 
-    query = select(DailyMetric).where(
-        and_(DailyMetric.user_id == user_id, DailyMetric.metric_date == metric_day)
+    values = [
+        {
+            "user_id": user_id,
+            "metric_date": metric_day,
+            "spend": spend,
+            "revenue": revenue,
+            "roi": calculate_roi(spend, revenue),
+        }
+        for user_id, metric_day, spend, revenue in rows
+    ]
+    if not values:
+        return
+
+    await upsert_rows(
+        session,
+        DailyMetric,
+        values,
+        key_columns=("user_id", "metric_date"),
+        batch_size=get_settings().metrics_write_batch_size,
     )
-    result = await session.execute(query)
-    instance = result.scalar_one_or_none()
-
-    if instance is None:
-        instance = DailyMetric(
-            user_id=user_id,
-            metric_date=metric_day,
-            spend=spend,
-            revenue=revenue,
-            roi=roi,
+    await refresh_rollups(session, ((value["user_id"], value["metric_date"]) for value in values))
+
+
+def describe_failure(error: BaseException) -> str:
+    # Provider URLs carry access tokens, so HTTP errors are summarised without them.
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"HTTP {error.response.status_code} from {error.request.url.host}"
+    if isinstance(error, httpx.TransportError):
+        return type(error).__name__
+    return str(error) or type(error).__name__
+
+
+class IntegrationSyncError(RuntimeError):
+    """Raised when one or more integrations of a user fail to sync."""
+
+    def __init__(self, failures: Dict[int, BaseException]) -> None:
+        self.failures = failures
+        details = "; ".join(
+            f"integration {integration_id}: {describe_failure(error)}"
+            for integration_id, error in failures.items()
         )
-        session.add(instance)
-    else:
-        instance.spend = spend
-        instance.revenue = revenue
-        instance.roi = roi
+        super().__init__(details)
+
+
+_global_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _get_global_semaphore() -> asyncio.Semaphore:
+    global _global_semaphore
+    if _global_semaphore is None:
+        _global_semaphore = asyncio.Semaphore(get_settings().sync_global_concurrency)
+    return _global_semaphore
+
+
+DailyTotals = Dict[date, Tuple[float, float]]
+
+
+async def _fetch_facebook(integration: IntegrationAccount, start: date, end: date) -> DailyTotals:
+    credentials = integration.credentials
+    client = AsyncFacebookAdsClient(
+        access_token=credentials["access_token"],
+        account_id=credentials["account_id"],
+        api_version=credentials.get("api_version", "v18.0"),
+        business_id=credentials.get("business_id"),
+    )
+    metrics = await client.fetch_metrics_range(start, end)
+    return {
+        day: (values.get("spend", 0.0), values.get("revenue", 0.0))
+        for day, values in metrics.items()
+    }
+
+
+async def _fetch_adsense(integration: IntegrationAccount, start: date, end: date) -> DailyTotals:
+    tokens = get_token_manager()
+    client = AsyncGoogleAdSenseClient(
+        account_id=integration.credentials["account_id"],
+        access_token=await tokens.get_access_token(integration),
+    )
+
+    try:
+        earnings = await client.fetch_earnings_range(start, end)
+    except AdSenseUnauthorizedError:
+        client.access_token = await tokens.get_access_token(
+            integration, rejected_token=client.access_token
+        )
+        earnings = await client.fetch_earnings_range(start, end)
+
+    return {day: (0.0, value) for day, value in earnings.items()}
+
+
+_FETCHERS = {
+    IntegrationType.FACEBOOK: _fetch_facebook,
+    IntegrationType.ADSENSE: _fetch_adsense,
+}
+
+
+# (integration_id, user_id, metric_date, spend, revenue)
+IntegrationMetricRow = Tuple[int, int, date, float, float]
+
+
+class IntegrationFetch(NamedTuple):
+    rows: List[IntegrationMetricRow]
+    failures: Dict[int, BaseException]
+
+
+# Awaited with (integration_id, error or None) as each integration's fetch ends.
+FetchCallback = Callable[[int, Optional[BaseException]], Awaitable[None]]
 
-    await session.flush()
-    return instance
 
+async def fetch_integration_metrics(
+    integrations: Iterable[IntegrationAccount],
+    plan: FetchPlan,
+    on_fetched: Optional[FetchCallback] = None,
+) -> IntegrationFetch:
+    """Fetch the planned days of every integration concurrently, bounded per user and globally.
 
-async def _ensure_adsense_access_token(
-    session: AsyncSession, integration: IntegrationAccount
-) -> str:
-    credentials = dict(integration.credentials)
-    now = datetime.now(timezone.utc)
-    should_refresh = True
+    Each contiguous range of an integration's plan is queried with one call,
+    through a circuit breaker that skips integrations failing repeatedly.
+    Integrations absent from ``plan`` are not queried. All fetches run to
+    completion even when some of them fail; failures are returned next to the
+    rows of the integrations that succeeded. Every planned day has a row, with
+    zeros for days without data. ``on_fetched`` is awaited as each integration
+    finishes, e.g. to report progress.
+    """
 
-    token_expiry_raw = credentials.get("token_expiry")
-    if token_expiry_raw:
+    settings = get_settings()
+    user_semaphore = asyncio.Semaphore(settings.sync_user_concurrency)
+    global_semaphore = _get_global_semaphore()
+
+    breaker = get_circuit_breaker()
+
+    async def fetch(integration: IntegrationAccount) -> DailyTotals:
+        totals: DailyTotals = {}
+        for start, end in plan[integration.id]:
+            totals.update(await _FETCHERS[integration.type](integration, start, end))
+        return totals
+
+    async def run(integration: IntegrationAccount) -> DailyTotals:
         try:
-            expiry = datetime.fromisoformat(token_expiry_raw)
-            if expiry.tzinfo is None:
-                expiry = expiry.replace(tzinfo=timezone.utc)
-            should_refresh = expiry <= now + timedelta(minutes=5)
-        except ValueError:
-            should_refresh = True
-    else:
-        should_refresh = True
-
-    if should_refresh:
-        refreshed = await asyncio.to_thread(
-            GoogleAdSenseClient.refresh_access_token,
-            client_id=credentials["client_id"],
-            client_secret=credentials["client_secret"],
-            refresh_token=credentials["refresh_token"],
+            # Checked before queueing so an open circuit never waits for a slot.
+            breaker.check(integration.id)
+            async with user_semaphore, global_semaphore:
+                totals = await breaker.call(integration.id, lambda: fetch(integration))
+        except Exception as exc:
+            if on_fetched is not None:
+                await on_fetched(integration.id, exc)
+            raise
+        if on_fetched is not None:
+            await on_fetched(integration.id, None)
+        return totals
+
+    integrations = [integration for integration in integrations if integration.id in plan]
+    results = await asyncio.gather(
+        *(run(integration) for integration in integrations), return_exceptions=True
+    )
+
+    fetched = IntegrationFetch(rows=[], failures={})
+    for integration, result in zip(integrations, results):
+        if isinstance(result, BaseException):
+            fetched.failures[integration.id] = result
+            continue
+        for start, end in plan[integration.id]:
+            for day in date_range(start, end):
+                spend, revenue = result.get(day, (0.0, 0.0))
+                fetched.rows.append((integration.id, integration.user_id, day, spend, revenue))
+    return fetched
+
+
+async def _get_syncable_integrations(
+    session: AsyncSession, user_id: int, integration_ids: Optional[Iterable[int]] = None
+) -> List[IntegrationAccount]:
+    wanted = set(integration_ids) if integration_ids is not None else None
+    return [
+        integration
+        for integration in await get_integrations(session, user_id)
+        if integration.type in _FETCHERS and (wanted is None or integration.id in wanted)
+    ]
+
+
+async def plan_integration_sync(
+    session: AsyncSession,
+    user_id: int,
+    start: date,
+    end: date,
+    integration_ids: Optional[Iterable[int]] = None,
+    force: bool = False,
+) -> Tuple[List[IntegrationAccount], FetchPlan]:
+    """Return the user's syncable integrations and the days of each one to fetch."""
+
+    integrations = await _get_syncable_integrations(session, user_id, integration_ids)
+    if force:
+        return integrations, full_plan(integrations, start, end)
+    return integrations, await plan_fetches(session, integrations, start, end)
+
+
+async def collect_integration_metrics(
+    session: AsyncSession,
+    user_id: int,
+    start: date,
+    end: date,
+    integration_ids: Optional[Iterable[int]] = None,
+    force: bool = False,
+) -> IntegrationFetch:
+    """Fetch the per-integration daily values of a user without writing anything.
+
+    Only days that are not settled yet are fetched unless ``force`` is set.
+    ``integration_ids`` restricts the fetch to some of the user's integrations.
+    Refreshed provider tokens are held by the token manager until written back.
+    """
+
+    integrations, plan = await plan_integration_sync(
+        session, user_id, start, end, integration_ids, force
+    )
+    return await fetch_integration_metrics(integrations, plan)
+
+
+async def upsert_integration_metrics(
+    session: AsyncSession, rows: Iterable[IntegrationMetricRow]
+) -> None:
+    """Insert or update per-integration daily values; the caller refreshes the totals."""
+
+    synced_at = datetime.utcnow()
+    await upsert_rows(
+        session,
+        IntegrationDailyMetric,
+        [
+            {
+                "integration_id": integration_id,
+                "user_id": user_id,
+                "metric_date": metric_day,
+                "spend": spend,
+                "revenue": revenue,
+                "synced_at": synced_at,
+            }
+            for integration_id, user_id, metric_day, spend, revenue in rows
+        ],
+        key_columns=("integration_id", "metric_date"),
+        batch_size=get_settings().metrics_write_batch_size,
+    )
+
+
+def _user_day_conditions(model: Any, days_by_user: Dict[int, Set[date]]) -> Any:
+    return or_(
+        *(
+            and_(
+                model.user_id == user_id,
+                model.metric_date >= min(user_days),
+                model.metric_date <= max(user_days),
+            )
+            for user_id, user_days in days_by_user.items()
         )
-        credentials["access_token"] = refreshed["access_token"]
-        credentials["token_expiry"] = refreshed["token_expiry"]
-        integration.credentials = credentials
-        await session.flush()
+    )
+
+
+def _group_days(days: Iterable[Tuple[int, date]]) -> Dict[int, Set[date]]:
+    days_by_user: Dict[int, Set[date]] = {}
+    for user_id, day in days:
+        days_by_user.setdefault(user_id, set()).add(day)
+    return days_by_user
 
-    return credentials["access_token"]
 
+async def refresh_daily_totals(
+    session: AsyncSession, days: Iterable[Tuple[int, date]], delete_empty: bool = False
+) -> Set[Tuple[int, date]]:
+    """Recompute ``daily_metrics`` for each ``(user_id, day)`` from the per-integration rows.
 
-async def sync_daily_metrics(session: AsyncSession, user_id: int, metric_day: date) -> DailyMetric:
-    facebook_integrations = await get_integrations(session, user_id, IntegrationType.FACEBOOK)
-    adsense_integrations = await get_integrations(session, user_id, IntegrationType.ADSENSE)
+    The sums are computed with one grouped query per user. Days without any
+    integration row keep their stored total, which may predate per-integration
+    values or belong to a fetch that failed, unless ``delete_empty`` is set, in
+    which case their total is deleted. Returns the days whose total was written
+    or deleted.
+    """
 
-    total_spend = 0.0
-    total_revenue = 0.0
+    days_by_user = _group_days(days)
+    if not days_by_user:
+        return set()
 
-    for integration in facebook_integrations:
-        credentials = integration.credentials
-        client = FacebookAdsClient(
-            access_token=credentials["access_token"],
-            account_id=credentials["account_id"],
-            api_version=credentials.get("api_version", "v18.0"),
-            business_id=credentials.get("business_id"),
+    result = await session.execute(
+        select(
+            IntegrationDailyMetric.user_id,
+            IntegrationDailyMetric.metric_date,
+            func.sum(IntegrationDailyMetric.spend),
+            func.sum(IntegrationDailyMetric.revenue),
         )
-        metrics = await asyncio.to_thread(client.fetch_daily_metrics, metric_day)
-        total_spend += metrics.get("spend", 0.0)
-        total_revenue += metrics.get("revenue", 0.0)
-
-    for integration in adsense_integrations:
-        credentials = integration.credentials
-        access_token = credentials.get("access_token")
-        if not access_token:
-            access_token = await _ensure_adsense_access_token(session, integration)
-        else:
-            now = datetime.now(timezone.utc)
-            expiry_raw = credentials.get("token_expiry")
-            if expiry_raw:
-                try:
-                    expiry = datetime.fromisoformat(expiry_raw)
-                    if expiry.tzinfo is None:
-                        expiry = expiry.replace(tzinfo=timezone.utc)
-                    if expiry <= now + timedelta(minutes=5):
-                        access_token = await _ensure_adsense_access_token(session, integration)
-                except ValueError:
-                    access_token = await _ensure_adsense_access_token(session, integration)
-            else:
-                access_token = await _ensure_adsense_access_token(session, integration)
-
-        client = GoogleAdSenseClient(
-            account_id=credentials["account_id"],
-            access_token=access_token,
+        .where(_user_day_conditions(IntegrationDailyMetric, days_by_user))
+        .group_by(IntegrationDailyMetric.user_id, IntegrationDailyMetric.metric_date)
+    )
+    sums = {
+        (user_id, day): (spend, revenue)
+        for user_id, day, spend, revenue in result.all()
+        if day in days_by_user[user_id]
+    }
+    await bulk_upsert_metrics(
+        session, ((user_id, day, *values) for (user_id, day), values in sorted(sums.items()))
+    )
+    if not delete_empty:
+        return set(sums)
+
+    empty = {
+        (user_id, day)
+        for user_id, user_days in days_by_user.items()
+        for day in user_days
+        if (user_id, day) not in sums
+    }
+    for user_id, day in empty:
+        await session.execute(
+            delete(DailyMetric).where(DailyMetric.user_id == user_id, DailyMetric.metric_date == day)
         )
+    await refresh_rollups(session, empty)
+    return set(sums) | empty
 
-        try:
-            earnings = await asyncio.to_thread(client.fetch_daily_earnings, metric_day)
-        except GoogleAdSenseClient.UnauthorizedError:
-            access_token = await _ensure_adsense_access_token(session, integration)
-            client = GoogleAdSenseClient(
-                account_id=credentials["account_id"],
-                access_token=access_token,
+
+async def _untracked_totals(
+    session: AsyncSession, days_by_user: Dict[int, Set[date]]
+) -> Set[Tuple[int, date]]:
+    """Return the days whose stored total has no per-integration row behind it yet."""
+
+    result = await session.execute(
+        select(DailyMetric.user_id, DailyMetric.metric_date).where(
+            _user_day_conditions(DailyMetric, days_by_user),
+            ~select(IntegrationDailyMetric.id)
+            .where(
+                IntegrationDailyMetric.user_id == DailyMetric.user_id,
+                IntegrationDailyMetric.metric_date == DailyMetric.metric_date,
             )
-            earnings = await asyncio.to_thread(client.fetch_daily_earnings, metric_day)
+            .exists(),
+        )
+    )
+    return {(user_id, day) for user_id, day in result.all() if day in days_by_user[user_id]}
+
 
-        total_revenue += earnings
+async def write_integration_metrics(
+    session: AsyncSession, rows: List[IntegrationMetricRow]
+) -> Set[int]:
+    """Store fetched per-integration rows and refresh the totals of the days they cover.
 
-    metric = await upsert_metric(
-        session=session,
-        user_id=user_id,
-        metric_day=metric_day,
-        spend=total_spend,
-        revenue=total_revenue,
+    Watermarks are advanced. A total stored before per-integration values were
+    kept has nothing else behind it, so it is only replaced once every syncable
+    integration of the user has a value for that day; until then a partial sync
+    would drop the share of the integrations it did not fetch. Returns the ids of
+    the users whose totals changed. The caller is responsible for committing.
+    """
+
+    if not rows:
+        return set()
+
+    fetched: Dict[Tuple[int, date], Set[int]] = {}
+    for integration_id, user_id, day, _, _ in rows:
+        fetched.setdefault((user_id, day), set()).add(integration_id)
+    untracked = await _untracked_totals(session, _group_days(fetched))
+
+    await upsert_integration_metrics(session, rows)
+    await advance_watermarks(session, {row[0] for row in rows})
+
+    if untracked:
+        syncable: Dict[int, Set[int]] = {}
+        result = await session.execute(
+            select(IntegrationAccount.user_id, IntegrationAccount.id).where(
+                IntegrationAccount.user_id.in_({user_id for user_id, _ in untracked}),
+                IntegrationAccount.type.in_(list(_FETCHERS)),
+            )
+        )
+        for user_id, integration_id in result.all():
+            syncable.setdefault(user_id, set()).add(integration_id)
+        untracked = {
+            key for key in untracked if not syncable.get(key[0], set()) <= fetched[key]
+        }
+
+    refreshed = await refresh_daily_totals(session, fetched.keys() - untracked)
+    return {user_id for user_id, _ in refreshed}
+
+
+async def remove_integration_metrics(session: AsyncSession, integration: IntegrationAccount) -> None:
+    """Delete an integration's daily values and take them out of the user's totals.
+
+    Days left without any integration value lose their total. No provider is
+    called. The caller is responsible for committing.
+    """
+
+    result = await session.execute(
+        select(IntegrationDailyMetric.metric_date).where(
+            IntegrationDailyMetric.integration_id == integration.id
+        )
+    )
+    days = list(result.scalars().all())
+    await session.execute(
+        delete(IntegrationDailyMetric).where(
+            IntegrationDailyMetric.integration_id == integration.id
+        )
     )
+    await reset_sync_state(session, integration.id)
+    await refresh_daily_totals(
+        session, ((integration.user_id, day) for day in days), delete_empty=True
+    )
+
+
+async def write_back_refreshed_tokens(session: AsyncSession) -> List[int]:
+    """Stage the provider tokens refreshed since the last write-back on ``session``.
+
+    Returns the ids of the affected users; their integrations' data version must
+    be bumped once the caller has committed.
+    """
+
+    return await get_token_manager().write_back(session)
+
+
+async def store_user_sync(session: AsyncSession, user_id: int, fetch: IntegrationFetch) -> None:
+    """Store a user's fetch; days no integration was fetched for keep their totals."""
+
+    updated_user_ids = await write_integration_metrics(session, fetch.rows)
+    refreshed_user_ids = await write_back_refreshed_tokens(session)
     await session.commit()
-    return metric
+    await metrics_updated(updated_user_ids)
+    await bump_data_version(INTEGRATIONS_SCOPE, refreshed_user_ids)
+    if fetch.failures:
+        raise IntegrationSyncError(fetch.failures)
 
 
-async def list_metrics(
+async def get_daily_metrics(
     session: AsyncSession, user_id: int, start: date, end: date
-) -> Dict[str, float]:
-    query = (
+) -> List[DailyMetric]:
+    result = await session.execute(
         select(DailyMetric)
         .where(
             and_(
@@ -176,17 +488,141 @@ async def list_metrics(
             )
         )
         .order_by(DailyMetric.metric_date)
+        .execution_options(populate_existing=True)
     )
-    result = await session.execute(query)
-    metrics = result.scalars().all()
+    return list(result.scalars().all())
+
+
+async def backfill_metrics(
+    session: AsyncSession,
+    user_id: int,
+    start: date,
+    end: date,
+    integration_ids: Optional[Iterable[int]] = None,
+    force: bool = False,
+) -> List[DailyMetric]:
+    """Fetch the unsettled days of ``start``..``end`` and store every day.
+
+    Each integration is queried once per contiguous run of unsettled days.
+    """
+
+    fetch = await collect_integration_metrics(
+        session, user_id, start, end, integration_ids, force
+    )
+    await store_user_sync(session, user_id, fetch)
+    return await get_daily_metrics(session, user_id, start, end)
 
-    total_spend = sum(metric.spend for metric in metrics)
-    total_revenue = sum(metric.revenue for metric in metrics)
-    average_roi = sum(metric.roi for metric in metrics) / len(metrics) if metrics else 0.0
 
+async def metrics_stamp(
+    session: AsyncSession,
+    user_id: int,
+    start: date,
+    end: date,
+    granularity: MetricGranularity = MetricGranularity.DAY,
+) -> Tuple[Any, ...]:
+    """Return values that change whenever the metrics read by :func:`list_metrics` may.
+
+    Read from the per-integration rows the totals derive from, so writes made by
+    any process are seen; the range is widened to whole periods like the rollups.
+    """
+
+    result = await session.execute(
+        select(
+            func.count(IntegrationDailyMetric.id),
+            func.max(IntegrationDailyMetric.synced_at),
+            func.sum(IntegrationDailyMetric.id),
+        ).where(
+            IntegrationDailyMetric.user_id == user_id,
+            IntegrationDailyMetric.metric_date >= period_start(start, granularity),
+            IntegrationDailyMetric.metric_date <= period_end(end, granularity),
+        )
+    )
+    return tuple(result.one())
+
+
+class MetricPoint(NamedTuple):
+    metric_date: date
+    spend: float
+    revenue: float
+    roi: float
+
+
+async def list_metrics(
+    session: AsyncSession,
+    user_id: int,
+    start: date,
+    end: date,
+    granularity: MetricGranularity = MetricGranularity.DAY,
+) -> Dict[str, float]:
+    if granularity != MetricGranularity.DAY:
+        return await _list_rollup_metrics(session, user_id, start, end, granularity)
+
+    rows = await session.execute(
+        select(
+            DailyMetric.metric_date,
+            DailyMetric.spend,
+            DailyMetric.revenue,
+            DailyMetric.roi,
+        )
+        .where(_daily_range(user_id, start, end))
+        .order_by(DailyMetric.metric_date)
+    )
+    return {"metrics": rows.all(), **await _daily_totals(session, user_id, start, end)}
+
+
+def _daily_range(user_id: int, start: date, end: date) -> Any:
+    return and_(
+        DailyMetric.user_id == user_id,
+        DailyMetric.metric_date >= start,
+        DailyMetric.metric_date <= end,
+    )
+
+
+async def _daily_totals(
+    session: AsyncSession, user_id: int, start: date, end: date
+) -> Dict[str, float]:
+    totals = await session.execute(
+        select(
+            func.coalesce(func.sum(DailyMetric.spend), 0.0),
+            func.coalesce(func.sum(DailyMetric.revenue), 0.0),
+            func.coalesce(func.avg(DailyMetric.roi), 0.0),
+        ).where(_daily_range(user_id, start, end))
+    )
+    total_spend, total_revenue, average_roi = totals.one()
     return {
-        "metrics": metrics,
         "total_spend": total_spend,
         "total_revenue": total_revenue,
         "average_roi": average_roi,
+        # Equivalent to the daily ROI averaged with spend as the weight.
+        "weighted_roi": calculate_roi(total_spend, total_revenue),
+    }
+
+
+async def _list_rollup_metrics(
+    session: AsyncSession,
+    user_id: int,
+    start: date,
+    end: date,
+    granularity: MetricGranularity,
+) -> Dict[str, float]:
+    """Read week or month rollups; the rows are widened to whole periods.
+
+    Each row carries the period's first day as ``metric_date`` and the ROI of
+    the period's summed spend and revenue. Totals cover ``start``..``end``
+    exactly, like those of daily granularity.
+    """
+
+    rollups = await list_rollups(session, user_id, granularity, start, end)
+
+    return {
+        "metrics": [
+            MetricPoint(
+                metric_date=rollup.period_start,
+                spend=rollup.spend,
+                revenue=rollup.revenue,
+                roi=calculate_roi(rollup.spend, rollup.revenue),
+            )
+            for rollup in rollups
+        ],
+        **await _daily_totals(session, user_id, start, end),
     }
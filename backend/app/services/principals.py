@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import time
+
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from ..core.config import get_settings
+from ..core.security import decode_access_token
+from ..models.user import User
+from .cache import USERS_SCOPE, LocalTTLCache, bump_data_version, data_version
+
+Claims = Dict[str, Any]
+# (users data version when loaded, column values)
+Principal = Tuple[int, Dict[str, Any]]
+
+
+@lru_cache()
+def _claims_cache() -> LocalTTLCache[Claims]:
+    return LocalTTLCache(get_settings().auth_cache_max_entries, "token_claims")
+
+
+@lru_cache()
+def _principal_cache() -> LocalTTLCache[Principal]:
+    return LocalTTLCache(get_settings().auth_cache_max_entries, "principals")
+
+
+def decode_token_claims(token: str) -> Claims:
+    """Verify ``token`` like :func:`decode_access_token`, reusing recent verifications.
+
+    A verified token is trusted for ``TOKEN_CLAIMS_CACHE_SECONDS``, and never
+    past its own expiry.
+    """
+
+    cache = _claims_cache()
+    claims = cache.get(token)
+    if claims is None:
+        claims = decode_access_token(token)
+        ttl = get_settings().token_claims_cache_seconds
+        expires_at = claims.get("exp")
+        if isinstance(expires_at, (int, float)):
+            ttl = min(ttl, expires_at - time.time())
+        cache.set(token, claims, ttl)
+    return claims
+
+
+def _detached_user(values: Dict[str, Any]) -> User:
+    # A fresh instance per request, so no two sessions ever share one.
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+
+async def get_principal(session: AsyncSession, user_id: int) -> Optional[User]:
+    """Return the user behind an authenticated request, from memory when still current.
+
+    A cached user is reused for ``PRINCIPAL_CACHE_TTL_SECONDS`` unless its data
+    version was bumped by :func:`invalidate_principals`, in this process or, with
+    the Redis cache, in any other. The returned user is detached from ``session``.
+    """
+
+    cache = _principal_cache()
+    version = await data_version(USERS_SCOPE, user_id)
+    cached = cache.get(user_id)
+    if cached is not None and cached[0] == version:
+        return _detached_user(cached[1])
+
+    user = await session.scalar(select(User).where(User.id == user_id))
+    if user is None:
+        cache.pop(user_id)
+        return None
+    values = {
+        attribute.key: getattr(user, attribute.key) for attribute in inspect(User).column_attrs
+    }
+    cache.set(user_id, (version, values), get_settings().principal_cache_ttl_seconds)
+    return user
+
+
+async def invalidate_principals(user_ids: Iterable[int]) -> None:
+    """Forget cached users; call after committing a change to, or the deletion of, a user."""
+
+    user_ids = set(user_ids)
+    for user_id in user_ids:
+        _principal_cache().pop(user_id)
+    await bump_data_version(USERS_SCOPE, user_ids)
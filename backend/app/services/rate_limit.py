@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+import asyncio
+import json
+import logging
+import time
+
+from ..core.config import get_settings
+from ..core.instrumentation import PROVIDER_THROTTLED
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderThrottledError(RuntimeError):
+    """Raised instead of waiting out a provider pause longer than the caller accepts."""
+
+    def __init__(self, retry_in_seconds: float) -> None:
+        self.retry_in_seconds = retry_in_seconds
+        super().__init__(f"throttled by the provider, next attempt in {retry_in_seconds:.0f}s")
+
+
+class TokenBucket:
+    """Async token bucket refilled at ``rate`` tokens per second.
+
+    Waiters are served in arrival order. The rate can be changed at any time and
+    the bucket can be paused, in which case nobody acquires until the pause ends.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, rate: float) -> None:
+        self._refill(time.monotonic())
+        self.rate = rate
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self, max_wait: Optional[float] = None) -> None:
+        """Take a token, raising :class:`ProviderThrottledError` if paused for over ``max_wait``."""
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    remaining = self._paused_until - now
+                    if max_wait is not None and remaining > max_wait:
+                        raise ProviderThrottledError(remaining)
+                    await asyncio.sleep(remaining)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def _load_header(headers: Mapping[str, str], name: str) -> Any:
+    raw = headers.get(name)
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
+
+
+def _max_number(values: Iterable[Any]) -> float:
+    return max((float(value) for value in values if isinstance(value, (int, float))), default=0.0)
+
+
+def _app_usage(headers: Mapping[str, str]) -> float:
+    usage = _load_header(headers, "x-app-usage")
+    if not isinstance(usage, dict):
+        return 0.0
+    return _max_number(usage.values())
+
+
+def _account_usage(headers: Mapping[str, str]) -> Tuple[float, float]:
+    """Return the highest account usage percentage and the seconds until it resets."""
+
+    usage = 0.0
+    reset_seconds = 0.0
+
+    account = _load_header(headers, "x-ad-account-usage")
+    if isinstance(account, dict):
+        usage = _max_number([account.get("acc_id_util_pct")])
+        reset_seconds = _max_number([account.get("reset_time_duration")])
+
+    business = _load_header(headers, "x-business-use-case-usage")
+    if isinstance(business, dict):
+        for entries in business.values():
+            for entry in entries if isinstance(entries, list) else []:
+                if not isinstance(entry, dict):
+                    continue
+                usage = max(
+                    usage,
+                    _max_number(
+                        entry.get(field) for field in ("call_count", "total_cputime", "total_time")
+                    ),
+                )
+                # Reported in minutes.
+                regain = _max_number([entry.get("estimated_time_to_regain_access")]) * 60
+                reset_seconds = max(reset_seconds, regain)
+
+    return usage, reset_seconds
+
+
+class FacebookRateLimiter:
+    """Token buckets for the Graph API, one for the app and one per ad account.
+
+    Every response's usage headers adjust the buckets: below
+    ``slowdown_pct`` the full rate is used, between ``slowdown_pct`` and
+    ``pause_pct`` the rate drops linearly, and from ``pause_pct`` on the bucket
+    is paused until Facebook reports the usage will be reset. Pauses longer than
+    ``max_wait_seconds`` fail the call instead of holding the sync's slots.
+    """
+
+    MIN_RATE_FRACTION = 0.1
+
+    def __init__(
+        self,
+        account_rate: float,
+        app_rate: float,
+        slowdown_pct: float,
+        pause_pct: float,
+        default_pause_seconds: float,
+        max_wait_seconds: Optional[float] = None,
+    ) -> None:
+        self.account_rate = account_rate
+        self.app_rate = app_rate
+        self.slowdown_pct = slowdown_pct
+        self.pause_pct = pause_pct
+        self.default_pause_seconds = default_pause_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self._app_bucket = TokenBucket(app_rate)
+        self._account_buckets: Dict[str, TokenBucket] = {}
+
+    def _account_bucket(self, account_id: str) -> TokenBucket:
+        bucket = self._account_buckets.get(account_id)
+        if bucket is None:
+            bucket = TokenBucket(self.account_rate)
+            self._account_buckets[account_id] = bucket
+        return bucket
+
+    async def acquire(self, account_id: str) -> None:
+        await self._app_bucket.acquire(self.max_wait_seconds)
+        await self._account_bucket(account_id).acquire(self.max_wait_seconds)
+
+    def _adjust(
+        self, bucket: TokenBucket, base_rate: float, usage: float, reset_seconds: float, label: str
+    ) -> None:
+        if usage >= self.pause_pct:
+            pause = reset_seconds or self.default_pause_seconds
+            logger.warning("Facebook %s usage at %.0f%%, pausing for %.0fs", label, usage, pause)
+            PROVIDER_THROTTLED.labels("graph.facebook.com", "usage").inc()
+            bucket.pause(pause)
+            bucket.set_rate(base_rate * self.MIN_RATE_FRACTION)
+        elif usage >= self.slowdown_pct:
+            progress = (usage - self.slowdown_pct) / (self.pause_pct - self.slowdown_pct)
+            bucket.set_rate(base_rate * (1 - progress * (1 - self.MIN_RATE_FRACTION)))
+        else:
+            bucket.set_rate(base_rate)
+
+    def observe(self, account_id: str, headers: Mapping[str, str]) -> None:
+        """Adapt the rates to the usage reported by a Graph API response."""
+
+        self._adjust(self._app_bucket, self.app_rate, _app_usage(headers), 0.0, "app")
+        usage, reset_seconds = _account_usage(headers)
+        self._adjust(
+            self._account_bucket(account_id),
+            self.account_rate,
+            usage,
+            reset_seconds,
+            f"account {account_id}",
+        )
+
+
+class FixedRateLimiter:
+    """Single token bucket for providers with a plain requests-per-minute quota."""
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        default_pause_seconds: float,
+        max_wait_seconds: Optional[float] = None,
+    ) -> None:
+        self.default_pause_seconds = default_pause_seconds
+        self.max_wait_seconds = max_wait_seconds
+        # Allow bursts of up to ten seconds' worth of quota.
+        self._bucket = TokenBucket(requests_per_minute / 60, max(requests_per_minute / 6, 1.0))
+
+    async def acquire(self) -> None:
+        await self._bucket.acquire(self.max_wait_seconds)
+
+    def observe(self, status_code: int, headers: Mapping[str, str]) -> None:
+        """Back off when the provider answers 429 despite the quota."""
+
+        if status_code != 429:
+            return
+        try:
+            pause = float(headers.get("retry-after", ""))
+        except ValueError:
+            pause = self.default_pause_seconds
+        self._bucket.pause(pause)
+
+
+@lru_cache()
+def get_facebook_rate_limiter() -> FacebookRateLimiter:
+    settings = get_settings()
+    return FacebookRateLimiter(
+        account_rate=settings.facebook_account_requests_per_second,
+        app_rate=settings.facebook_app_requests_per_second,
+        slowdown_pct=settings.facebook_usage_slowdown_pct,
+        pause_pct=settings.facebook_usage_pause_pct,
+        default_pause_seconds=settings.rate_limit_default_pause_seconds,
+        max_wait_seconds=settings.rate_limit_max_wait_seconds,
+    )
+
+
+@lru_cache()
+def get_adsense_rate_limiter() -> FixedRateLimiter:
+    settings = get_settings()
+    return FixedRateLimiter(
+        settings.adsense_requests_per_minute,
+        settings.rate_limit_default_pause_seconds,
+        settings.rate_limit_max_wait_seconds,
+    )
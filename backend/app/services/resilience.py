@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+import asyncio
+import logging
+import random
+import time
+
+import httpx
+
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether a provider call failing with ``error`` is worth retrying."""
+
+    if isinstance(error, httpx.HTTPStatusError):
+        status_code = error.response.status_code
+        return status_code == 429 or status_code >= 500
+    # Timeouts, connection resets and other network failures.
+    return isinstance(error, httpx.TransportError)
+
+
+async def retry_transient(call: Callable[[], Awaitable[T]]) -> T:
+    """Run ``call``, retrying transient failures with exponential backoff and full jitter."""
+
+    settings = get_settings()
+    attempt = 1
+    while True:
+        try:
+            return await call()
+        except Exception as error:
+            if attempt >= settings.provider_retry_attempts or not is_transient(error):
+                raise
+            delay = random.uniform(
+                0,
+                min(
+                    settings.provider_retry_max_delay_seconds,
+                    settings.provider_retry_base_delay_seconds * 2 ** (attempt - 1),
+                ),
+            )
+            logger.info("Transient provider error (%s), retry %d in %.2fs", error, attempt, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider for an integration that keeps failing."""
+
+    def __init__(self, retry_in_seconds: float) -> None:
+        self.retry_in_seconds = retry_in_seconds
+        super().__init__(
+            f"skipped after repeated failures, next attempt in {retry_in_seconds:.0f}s"
+        )
+
+
+@dataclass
+class _CircuitState:
+    failures: int = 0
+    open_until: Optional[float] = None
+
+
+class CircuitBreaker:
+    """Per-key circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and calls
+    fail fast for ``cooldown_seconds``. The first call after the cooldown goes
+    through; one more failure reopens the circuit, a success closes it.
+    """
+
+    def __init__(self, failure_threshold: int, cooldown_seconds: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._states: Dict[Hashable, _CircuitState] = {}
+
+    def check(self, key: Hashable) -> None:
+        state = self._states.get(key)
+        if state is None or state.open_until is None:
+            return
+        remaining = state.open_until - time.monotonic()
+        if remaining > 0:
+            raise CircuitOpenError(remaining)
+        state.open_until = None
+
+    def record_success(self, key: Hashable) -> None:
+        self._states.pop(key, None)
+
+    def record_failure(self, key: Hashable) -> None:
+        state = self._states.setdefault(key, _CircuitState())
+        state.failures += 1
+        if state.failures >= self.failure_threshold:
+            state.open_until = time.monotonic() + self.cooldown_seconds
+
+    def reset(self, key: Hashable) -> None:
+        self._states.pop(key, None)
+
+    async def call(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        self.check(key)
+        try:
+            result = await call()
+        except Exception:
+            self.record_failure(key)
+            raise
+        self.record_success(key)
+        return result
+
+
+@lru_cache()
+def get_circuit_breaker() -> CircuitBreaker:
+    settings = get_settings()
+    return CircuitBreaker(
+        settings.circuit_breaker_failure_threshold,
+        settings.circuit_breaker_cooldown_seconds,
+    )
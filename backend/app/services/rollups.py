@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+from calendar import monthrange
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import and_, delete, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.database import upsert_rows
+from ..models.metrics import DailyMetric, MetricGranularity, MetricRollup
+
+ROLLUP_GRANULARITIES = (MetricGranularity.WEEK, MetricGranularity.MONTH)
+
+# (user_id, granularity, period_start)
+Period = Tuple[int, MetricGranularity, date]
+
+
+def period_start(day: date, granularity: MetricGranularity) -> date:
+    """Return the first day of the period containing ``day`` (weeks start on Monday)."""
+
+    if granularity == MetricGranularity.WEEK:
+        return day - timedelta(days=day.weekday())
+    if granularity == MetricGranularity.MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def period_end(day: date, granularity: MetricGranularity) -> date:
+    """Return the last day of the period containing ``day``."""
+
+    start = period_start(day, granularity)
+    if granularity == MetricGranularity.WEEK:
+        return start + timedelta(days=6)
+    if granularity == MetricGranularity.MONTH:
+        return start.replace(day=monthrange(start.year, start.month)[1])
+    return day
+
+
+async def _refresh_periods(session: AsyncSession, periods: Set[Period]) -> None:
+    if not periods:
+        return
+
+    bounds: Dict[int, Tuple[date, date]] = {}
+    for user_id, granularity, start in periods:
+        end = period_end(start, granularity)
+        low, high = bounds.get(user_id, (start, end))
+        bounds[user_id] = (min(low, start), max(high, end))
+
+    result = await session.execute(
+        select(
+            DailyMetric.user_id,
+            DailyMetric.metric_date,
+            DailyMetric.spend,
+            DailyMetric.revenue,
+            DailyMetric.roi,
+        ).where(
+            or_(
+                *(
+                    and_(
+                        DailyMetric.user_id == user_id,
+                        DailyMetric.metric_date >= low,
+                        DailyMetric.metric_date <= high,
+                    )
+                    for user_id, (low, high) in bounds.items()
+                )
+            )
+        )
+    )
+
+    sums: Dict[Period, List[float]] = {}
+    for user_id, metric_date, spend, revenue, roi in result.all():
+        for granularity in ROLLUP_GRANULARITIES:
+            period = (user_id, granularity, period_start(metric_date, granularity))
+            if period not in periods:
+                continue
+            totals = sums.setdefault(period, [0.0, 0.0, 0.0, 0])
+            totals[0] += spend
+            totals[1] += revenue
+            totals[2] += roi
+            totals[3] += 1
+
+    await upsert_rows(
+        session,
+        MetricRollup,
+        [
+            {
+                "user_id": user_id,
+                "granularity": granularity,
+                "period_start": start,
+                "spend": spend,
+                "revenue": revenue,
+                "roi_sum": roi_sum,
+                "day_count": day_count,
+            }
+            for (user_id, granularity, start), (spend, revenue, roi_sum, day_count) in sums.items()
+        ],
+        key_columns=("user_id", "granularity", "period_start"),
+    )
+
+    for user_id, granularity, start in periods - sums.keys():
+        await session.execute(
+            delete(MetricRollup).where(
+                MetricRollup.user_id == user_id,
+                MetricRollup.granularity == granularity,
+                MetricRollup.period_start == start,
+            )
+        )
+
+
+async def refresh_rollups(session: AsyncSession, days: Iterable[Tuple[int, date]]) -> None:
+    """Recompute the week and month rollups containing each ``(user_id, day)``.
+
+    Only the affected periods are read back from ``daily_metrics``; the caller
+    is responsible for committing.
+    """
+
+    await _refresh_periods(
+        session,
+        {
+            (user_id, granularity, period_start(day, granularity))
+            for user_id, day in days
+            for granularity in ROLLUP_GRANULARITIES
+        },
+    )
+
+
+async def rebuild_rollups_if_empty(session: AsyncSession) -> None:
+    """Build rollups for daily metrics written before rollups existed."""
+
+    has_rollups = await session.scalar(select(MetricRollup.id).limit(1))
+    if has_rollups is not None:
+        return
+
+    result = await session.execute(
+        select(
+            DailyMetric.user_id,
+            func.min(DailyMetric.metric_date),
+            func.max(DailyMetric.metric_date),
+        ).group_by(DailyMetric.user_id)
+    )
+    for user_id, first_day, last_day in result.all():
+        periods: Set[Period] = set()
+        for granularity in ROLLUP_GRANULARITIES:
+            start = period_start(first_day, granularity)
+            while start <= last_day:
+                periods.add((user_id, granularity, start))
+                start = period_end(start, granularity) + timedelta(days=1)
+        await _refresh_periods(session, periods)
+    await session.commit()
+
+
+async def list_rollups(
+    session: AsyncSession,
+    user_id: int,
+    granularity: MetricGranularity,
+    start: date,
+    end: date,
+) -> List[MetricRollup]:
+    """Return the rollups of every period overlapping ``start``..``end``."""
+
+    result = await session.execute(
+        select(MetricRollup)
+        .where(
+            MetricRollup.user_id == user_id,
+            MetricRollup.granularity == granularity,
+            MetricRollup.period_start >= period_start(start, granularity),
+            MetricRollup.period_start <= end,
+        )
+        .order_by(MetricRollup.period_start)
+    )
+    return list(result.scalars().all())
@@ -1,38 +1,17 @@
 from datetime import date
 
-import textwrap
-
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from sqlalchemy import select
+from apscheduler.triggers.interval import IntervalTrigger
 
 from ..core.config import get_settings
-from ..core.database import AsyncSessionLocal
-from ..models.notification import NotificationLevel, SyncNotification
-from ..models.user import User
-from .metrics import sync_daily_metrics
+from .coordination import run_shared_sync
+from .sync_jobs import run_pending_sync_jobs
 
 
 async def _sync_all_users() -> None:
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(select(User.id))
-        user_ids = [row[0] for row in result.all()]
-        today = date.today()
-        for user_id in user_ids:
-            try:
-                await sync_daily_metrics(session, user_id, today)
-            except Exception as exc:  # noqa: BLE001
-                await session.rollback()
-                message = (
-                    f"Falha ao sincronizar métricas de {today.isoformat()}: {exc}"
-                )
-                notification = SyncNotification(
-                    user_id=user_id,
-                    level=NotificationLevel.ERROR,
-                    message=textwrap.shorten(message, width=500, placeholder="…"),
-                )
-                session.add(notification)
-                await session.commit()
+    # Every process runs this job; they share one run through work items.
+    await run_shared_sync(date.today())
 
 
 async def start_scheduler() -> AsyncIOScheduler:
@@ -43,10 +22,18 @@ async def start_scheduler() -> AsyncIOScheduler:
         minute=settings.scheduler_daily_minute_utc,
     )
     scheduler.add_job(_sync_all_users, trigger, id="daily-sync", replace_existing=True)
+    # Picks up jobs queued through the API that no process is running.
+    scheduler.add_job(
+        run_pending_sync_jobs,
+        IntervalTrigger(seconds=settings.sync_poll_interval_seconds),
+        id="sync-jobs",
+        replace_existing=True,
+        coalesce=True,
+    )
     scheduler.start()
     return scheduler
 
 
 async def shutdown_scheduler(scheduler: AsyncIOScheduler | None) -> None:
     if scheduler is not None:
-        await scheduler.shutdown(wait=False)
+        scheduler.shutdown(wait=False)
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+
+import asyncio
+import logging
+import textwrap
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import get_settings
+from ..core.database import AsyncSessionLocal
+from ..core.instrumentation import SYNC_USER_DURATION
+from ..models.notification import NotificationLevel, SyncNotification
+from ..models.user import User
+from .cache import INTEGRATIONS_SCOPE, bump_data_version
+from .events import metrics_updated, publish_notification
+from .freshness import max_attribution_window
+from .http import provider_request_count
+from .metrics import (
+    IntegrationMetricRow,
+    IntegrationSyncError,
+    collect_integration_metrics,
+    write_back_refreshed_tokens,
+    write_integration_metrics,
+)
+from .tokens import get_token_manager
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SyncRunStats:
+    users_synced: int = 0
+    users_failed: int = 0
+    provider_calls: int = 0
+    elapsed_seconds: float = 0.0
+    timed_out: bool = False
+
+    @property
+    def users_per_second(self) -> float:
+        if not self.elapsed_seconds:
+            return 0.0
+        return (self.users_synced + self.users_failed) / self.elapsed_seconds
+
+    @property
+    def provider_calls_per_second(self) -> float:
+        if not self.elapsed_seconds:
+            return 0.0
+        return self.provider_calls / self.elapsed_seconds
+
+
+async def stream_user_ids(
+    session_factory: Callable[[], AsyncSession], chunk_size: int, after: int = 0
+) -> AsyncIterator[List[int]]:
+    """Yield the ids of users above ``after`` in ascending chunks using keyset pagination."""
+
+    last_id = after
+    while True:
+        async with session_factory() as session:
+            result = await session.execute(
+                select(User.id).where(User.id > last_id).order_by(User.id).limit(chunk_size)
+            )
+            chunk = list(result.scalars().all())
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1]
+
+
+class SyncEngine:
+    """Sync every user for a day with a bounded pool of concurrent workers.
+
+    Besides the day itself, the preceding days still inside an integration's
+    attribution window are refetched, as are any of them never synced; settled
+    days are skipped.
+
+    Each user's provider data is fetched on its own session, so one failure never
+    rolls back the work of another user; integrations that fail keep their
+    previous values while the others are updated. The resulting rows are written in
+    batches of ``write_batch_size`` with one commit per batch, together with the
+    provider tokens refreshed in the meantime. The run stops
+    dispatching new users once the deadline is reached; rows already fetched are
+    still written.
+
+    By default every user is synced. ``user_source`` can supply the user ids
+    instead, and ``on_commit`` is awaited inside each write transaction with the
+    ids of the users it settles, failed ones included.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        deadline_seconds: Optional[float] = None,
+        write_batch_size: Optional[int] = None,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        user_source: Optional[AsyncIterator[List[int]]] = None,
+        on_commit: Optional[Callable[[AsyncSession, List[int]], Awaitable[None]]] = None,
+    ) -> None:
+        settings = get_settings()
+        self.workers = workers or settings.sync_workers
+        self.chunk_size = chunk_size or settings.sync_user_chunk_size
+        self.deadline_seconds = deadline_seconds or settings.sync_run_deadline_seconds
+        self.write_batch_size = write_batch_size or settings.metrics_write_batch_size
+        self.session_factory = session_factory
+        self.user_source = user_source
+        self.on_commit = on_commit
+        # One day past the window, so the last nightly fetch of a day happens once
+        # the window has closed and settles it (see ``is_settled``).
+        self.lookback = max_attribution_window() + timedelta(days=1)
+        self._pending_rows: List[IntegrationMetricRow] = []
+        # (user_id, metric_day, whether every integration of the user was fetched)
+        self._pending_users: List[Tuple[int, date, bool]] = []
+        self._pending_failed: List[int] = []
+        self._write_lock = asyncio.Lock()
+
+    async def _notify_failure(self, user_id: int, metric_day: date, exc: Exception) -> None:
+        message = f"Falha ao sincronizar métricas de {metric_day.isoformat()}: {exc}"
+        notification = SyncNotification(
+            user_id=user_id,
+            level=NotificationLevel.ERROR,
+            message=textwrap.shorten(message, width=500, placeholder="…"),
+        )
+        async with self.session_factory() as session:
+            session.add(notification)
+            await session.commit()
+        await publish_notification(notification)
+
+    async def _flush(self, stats: SyncRunStats) -> None:
+        async with self._write_lock:
+            rows, self._pending_rows = self._pending_rows, []
+            users, self._pending_users = self._pending_users, []
+            failed, self._pending_failed = self._pending_failed, []
+            if not users and not failed and not get_token_manager().has_pending():
+                return
+            try:
+                async with self.session_factory() as session:
+                    refreshed_user_ids = await write_back_refreshed_tokens(session)
+                    updated_user_ids = await write_integration_metrics(session, rows)
+                    if self.on_commit is not None:
+                        await self.on_commit(
+                            session, [user_id for user_id, _, _ in users] + failed
+                        )
+                    await session.commit()
+            except Exception as exc:  # noqa: BLE001
+                for user_id, metric_day, complete in users:
+                    # Partially fetched users were already counted and notified.
+                    if complete:
+                        stats.users_failed += 1
+                        await self._notify_failure(user_id, metric_day, exc)
+            else:
+                stats.users_synced += sum(1 for _, _, complete in users if complete)
+                await metrics_updated(updated_user_ids)
+                await bump_data_version(INTEGRATIONS_SCOPE, refreshed_user_ids)
+
+    async def _sync_user(self, user_id: int, metric_day: date, stats: SyncRunStats) -> None:
+        started = time.perf_counter()
+        try:
+            async with self.session_factory() as session:
+                fetch = await collect_integration_metrics(
+                    session, user_id, metric_day - self.lookback, metric_day
+                )
+        except Exception as exc:  # noqa: BLE001
+            SYNC_USER_DURATION.labels("failed").observe(time.perf_counter() - started)
+            stats.users_failed += 1
+            await self._notify_failure(user_id, metric_day, exc)
+            self._pending_failed.append(user_id)
+            return
+
+        complete = not fetch.failures
+        SYNC_USER_DURATION.labels("complete" if complete else "partial").observe(
+            time.perf_counter() - started
+        )
+        if not complete:
+            stats.users_failed += 1
+            await self._notify_failure(user_id, metric_day, IntegrationSyncError(fetch.failures))
+
+        self._pending_rows.extend(fetch.rows)
+        self._pending_users.append((user_id, metric_day, complete))
+        if len(self._pending_users) >= self.write_batch_size:
+            # Shielded so a deadline cancellation never drops a batch mid-write.
+            await asyncio.shield(self._flush(stats))
+
+    async def _worker(self, queue: asyncio.Queue, metric_day: date, stats: SyncRunStats) -> None:
+        while True:
+            user_id = await queue.get()
+            try:
+                if user_id is None:
+                    return
+                await self._sync_user(user_id, metric_day, stats)
+            finally:
+                queue.task_done()
+
+    async def _produce(self, queue: asyncio.Queue) -> None:
+        source = self.user_source or stream_user_ids(self.session_factory, self.chunk_size)
+        async for chunk in source:
+            for user_id in chunk:
+                await queue.put(user_id)
+        for _ in range(self.workers):
+            await queue.put(None)
+
+    async def run(self, metric_day: date) -> SyncRunStats:
+        stats = SyncRunStats()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.workers * 2)
+        calls_before = provider_request_count()
+        started = time.monotonic()
+
+        tasks = [asyncio.create_task(self._produce(queue))]
+        tasks.extend(
+            asyncio.create_task(self._worker(queue, metric_day, stats))
+            for _ in range(self.workers)
+        )
+        try:
+            async with asyncio.timeout(self.deadline_seconds):
+                await asyncio.gather(*tasks)
+        except TimeoutError:
+            stats.timed_out = True
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._flush(stats)
+
+        stats.elapsed_seconds = time.monotonic() - started
+        stats.provider_calls = provider_request_count() - calls_before
+        logger.info(
+            "Sync of %s finished in %.1fs%s: %d users synced, %d failed "
+            "(%.2f users/s, %d provider calls, %.2f calls/s)",
+            metric_day.isoformat(),
+            stats.elapsed_seconds,
+            " (deadline reached)" if stats.timed_out else "",
+            stats.users_synced,
+            stats.users_failed,
+            stats.users_per_second,
+            stats.provider_calls,
+            stats.provider_calls_per_second,
+        )
+        return stats
@@ -0,0 +1,390 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+import asyncio
+import logging
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import get_settings
+from ..core.database import AsyncSessionLocal, insert_missing_rows
+from ..models.scheduling import (
+    SyncJob,
+    SyncJobIntegration,
+    SyncJobIntegrationStatus,
+    SyncJobStatus,
+)
+from .events import SYNC_JOB_EVENT, SYNC_JOB_PROGRESS_EVENT, publish_event
+from .freshness import date_range
+from .leases import LeaseHeartbeat, process_identity
+from .metrics import (
+    IntegrationSyncError,
+    describe_failure,
+    fetch_integration_metrics,
+    plan_integration_sync,
+    store_user_sync,
+)
+
+logger = logging.getLogger(__name__)
+
+# (job id, attempt); the attempt tells the runner's claim apart from later ones.
+Claim = Tuple[int, int]
+
+
+def _active_key(
+    user_id: int, start: date, end: date, integration_ids: Optional[List[int]], force: bool
+) -> str:
+    integrations = ",".join(str(integration_id) for integration_id in integration_ids or ()) or "*"
+    return f"{user_id}:{start.isoformat()}:{end.isoformat()}:{integrations}:{int(force)}"
+
+
+async def enqueue_sync_job(
+    session: AsyncSession,
+    user_id: int,
+    start: date,
+    end: date,
+    integration_ids: Optional[Iterable[int]] = None,
+    force: bool = False,
+) -> Tuple[SyncJob, bool]:
+    """Queue a sync of ``start``..``end`` for a user, or join the identical one still open.
+
+    Returns the job and whether it was created. Commits on its own.
+    """
+
+    wanted = sorted(set(integration_ids)) if integration_ids is not None else None
+    key = _active_key(user_id, start, end, wanted, force)
+    while True:
+        created = (
+            await insert_missing_rows(
+                session,
+                SyncJob,
+                [
+                    {
+                        "user_id": user_id,
+                        "start_date": start,
+                        "end_date": end,
+                        "integration_ids": wanted,
+                        "force": force,
+                        "active_key": key,
+                    }
+                ],
+                key_columns=("active_key",),
+            )
+            > 0
+        )
+        await session.commit()
+        job = await session.scalar(select(SyncJob).where(SyncJob.active_key == key))
+        # The open job may have finished in between; a new one is queued then.
+        if job is not None:
+            return job, created
+
+
+async def get_sync_job(session: AsyncSession, user_id: int, job_id: int) -> Optional[SyncJob]:
+    return await session.scalar(
+        select(SyncJob)
+        .where(SyncJob.id == job_id, SyncJob.user_id == user_id)
+        .execution_options(populate_existing=True)
+    )
+
+
+def _held(claim: Claim, holder: str) -> Any:
+    job_id, attempt = claim
+    return and_(
+        SyncJob.id == job_id,
+        SyncJob.status == SyncJobStatus.RUNNING,
+        SyncJob.claimed_by == holder,
+        SyncJob.attempts == attempt,
+    )
+
+
+class JobClaimHeartbeat(LeaseHeartbeat):
+    """Extend a running job's claim in the background; ``lost`` turns true if it was taken over.
+
+    The claim is cleared when the job finishes rather than on exit.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        claim: Claim,
+        holder: str,
+        ttl: timedelta,
+    ) -> None:
+        super().__init__(session_factory, f"sync job {claim[0]}", holder, ttl)
+        self.claim = claim
+
+    async def renew(self, session: AsyncSession) -> bool:
+        result = await session.execute(
+            update(SyncJob)
+            .where(_held(self.claim, self.holder))
+            .values(claimed_until=datetime.utcnow() + self.ttl)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        return result.rowcount > 0
+
+    async def release(self, session: AsyncSession) -> None:
+        """Nothing to do: :meth:`SyncJobRunner._finish` clears the claim."""
+
+
+class SyncJobRunner:
+    """Run queued sync jobs, in whichever process claims them first.
+
+    A job is claimed for ``SYNC_WORK_ITEM_LEASE_SECONDS`` and the claim is
+    renewed while it runs; if its process dies the claim expires and another
+    process runs it again, up to ``SYNC_WORK_ITEM_MAX_ATTEMPTS`` times. Only the
+    current claim can finish a job.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        holder: Optional[str] = None,
+    ) -> None:
+        settings = get_settings()
+        self.session_factory = session_factory
+        self.holder = holder or process_identity()
+        self.claim_ttl = timedelta(seconds=settings.sync_work_item_lease_seconds)
+        self.max_attempts = settings.sync_work_item_max_attempts
+        self.concurrency = settings.sync_workers
+        self.retention = timedelta(days=settings.sync_job_retention_days)
+
+    async def _claim(self, job_id: Optional[int] = None, limit: int = 1) -> List[Claim]:
+        now = datetime.utcnow()
+        claimable = (
+            select(SyncJob.id)
+            .where(
+                SyncJob.attempts < self.max_attempts,
+                or_(
+                    SyncJob.status == SyncJobStatus.QUEUED,
+                    and_(SyncJob.status == SyncJobStatus.RUNNING, SyncJob.claimed_until < now),
+                ),
+            )
+            .order_by(SyncJob.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        if job_id is not None:
+            claimable = claimable.where(SyncJob.id == job_id)
+        async with self.session_factory() as session:
+            result = await session.execute(
+                update(SyncJob)
+                .where(SyncJob.id.in_(claimable.scalar_subquery()))
+                .values(
+                    status=SyncJobStatus.RUNNING,
+                    claimed_by=self.holder,
+                    claimed_until=now + self.claim_ttl,
+                    attempts=SyncJob.attempts + 1,
+                    started_at=now,
+                )
+                .returning(SyncJob.id, SyncJob.attempts)
+                .execution_options(synchronize_session=False)
+            )
+            claims = [(job_id, attempt) for job_id, attempt in result.all()]
+            await session.commit()
+        return claims
+
+    async def _finish(
+        self, session: AsyncSession, claim: Claim, status: SyncJobStatus, error: Optional[str]
+    ) -> None:
+        job_id = claim[0]
+        result = await session.execute(
+            update(SyncJob)
+            .where(_held(claim, self.holder))
+            .values(
+                status=status,
+                error=error,
+                active_key=None,
+                claimed_until=None,
+                finished_at=datetime.utcnow(),
+            )
+            .returning(SyncJob.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        user_id = result.scalar_one_or_none()
+        await session.commit()
+        if user_id is None:
+            logger.warning("Sync job %s was claimed again before it finished", job_id)
+        else:
+            await publish_event(
+                [user_id], SYNC_JOB_EVENT, {"id": job_id, "status": status.value, "error": error}
+            )
+
+    async def _set_progress(
+        self,
+        job_id: int,
+        integration_ids: Iterable[int],
+        status: SyncJobIntegrationStatus,
+        error: Optional[str] = None,
+        session: Optional[AsyncSession] = None,
+    ) -> None:
+        statement = (
+            update(SyncJobIntegration)
+            .where(
+                SyncJobIntegration.job_id == job_id,
+                SyncJobIntegration.integration_id.in_(list(integration_ids)),
+            )
+            .values(status=status, error=error, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if session is not None:
+            await session.execute(statement)
+            return
+        async with self.session_factory() as progress_session:
+            await progress_session.execute(statement)
+            await progress_session.commit()
+
+    async def _execute(self, claim: Claim) -> None:
+        job_id = claim[0]
+        heartbeat = JobClaimHeartbeat(self.session_factory, claim, self.holder, self.claim_ttl)
+        async with heartbeat, self.session_factory() as session:
+            job = await session.get(SyncJob, job_id)
+            user_id, start, end = job.user_id, job.start_date, job.end_date
+            integrations, plan = await plan_integration_sync(
+                session, user_id, start, end, job.integration_ids, job.force
+            )
+
+            # A retried job starts its progress over.
+            await session.execute(
+                delete(SyncJobIntegration).where(SyncJobIntegration.job_id == job_id)
+            )
+            await insert_missing_rows(
+                session,
+                SyncJobIntegration,
+                [
+                    {
+                        "job_id": job_id,
+                        "integration_id": integration.id,
+                        "status": SyncJobIntegrationStatus.PENDING
+                        if integration.id in plan
+                        else SyncJobIntegrationStatus.SKIPPED,
+                        "days": sum(
+                            len(date_range(range_start, range_end))
+                            for range_start, range_end in plan.get(integration.id, ())
+                        ),
+                    }
+                    for integration in integrations
+                ],
+                key_columns=("job_id", "integration_id"),
+            )
+            await session.commit()
+            await publish_event(
+                [user_id],
+                SYNC_JOB_EVENT,
+                {"id": job_id, "status": SyncJobStatus.RUNNING.value, "error": None},
+            )
+
+            async def on_fetched(integration_id: int, error: Optional[BaseException]) -> None:
+                if error is None:
+                    status, detail = SyncJobIntegrationStatus.FETCHED, None
+                else:
+                    status, detail = SyncJobIntegrationStatus.FAILED, describe_failure(error)
+                try:
+                    await self._set_progress(job_id, [integration_id], status, detail)
+                except Exception:  # noqa: BLE001
+                    logger.exception("Could not record the progress of sync job %s", job_id)
+                    return
+                await publish_event(
+                    [user_id],
+                    SYNC_JOB_PROGRESS_EVENT,
+                    {
+                        "job_id": job_id,
+                        "integration_id": integration_id,
+                        "status": status.value,
+                        "error": detail,
+                    },
+                )
+
+            fetch = await fetch_integration_metrics(integrations, plan, on_fetched)
+            if heartbeat.lost:
+                # Another runner holds the job now and writes its own results.
+                return
+            try:
+                await store_user_sync(session, user_id, fetch)
+            except IntegrationSyncError as exc:
+                error: Optional[str] = str(exc)
+            else:
+                error = None
+
+            fetched = [
+                integration.id
+                for integration in integrations
+                if integration.id in plan and integration.id not in fetch.failures
+            ]
+            await self._set_progress(
+                job_id, fetched, SyncJobIntegrationStatus.SUCCEEDED, session=session
+            )
+            if not fetch.failures:
+                status = SyncJobStatus.SUCCEEDED
+            elif len(fetch.failures) < len(plan):
+                status = SyncJobStatus.PARTIAL
+            else:
+                status = SyncJobStatus.FAILED
+            await self._finish(session, claim, status, error)
+
+    async def run(self, job_id: int) -> None:
+        async with self.session_factory() as session:
+            await self._fail_abandoned(session)
+        await self._run_claimed(await self._claim(job_id))
+
+    async def _run_claimed(self, claims: List[Claim]) -> None:
+        async def run_one(claim: Claim) -> None:
+            try:
+                await self._execute(claim)
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("Sync job %s failed", claim[0])
+                async with self.session_factory() as session:
+                    await self._finish(session, claim, SyncJobStatus.FAILED, describe_failure(exc))
+
+        await asyncio.gather(*(run_one(claim) for claim in claims))
+
+    async def _fail_abandoned(self, session: AsyncSession) -> None:
+        await session.execute(
+            update(SyncJob)
+            .where(
+                SyncJob.status == SyncJobStatus.RUNNING,
+                SyncJob.claimed_until < datetime.utcnow(),
+                SyncJob.attempts >= self.max_attempts,
+            )
+            .values(
+                status=SyncJobStatus.FAILED,
+                error="Abandoned after repeated interruptions",
+                active_key=None,
+                claimed_until=None,
+                finished_at=datetime.utcnow(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+
+    async def run_pending(self) -> None:
+        """Run every claimable job, ``SYNC_WORKERS`` at a time, and prune old finished jobs."""
+
+        async with self.session_factory() as session:
+            await self._fail_abandoned(session)
+            expired = select(SyncJob.id).where(
+                SyncJob.finished_at < datetime.utcnow() - self.retention
+            )
+            await session.execute(
+                delete(SyncJobIntegration).where(SyncJobIntegration.job_id.in_(expired))
+            )
+            await session.execute(delete(SyncJob).where(SyncJob.id.in_(expired)))
+            await session.commit()
+        while True:
+            claims = await self._claim(limit=self.concurrency)
+            if not claims:
+                return
+            await self._run_claimed(claims)
+
+
+async def run_sync_job(job_id: int) -> None:
+    """Run job ``job_id`` unless another process already is."""
+
+    await SyncJobRunner().run(job_id)
+
+
+async def run_pending_sync_jobs() -> None:
+    await SyncJobRunner().run_pending()
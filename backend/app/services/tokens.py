@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional
+
+import asyncio
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import get_settings
+from ..models.integration import IntegrationAccount
+from .google_adsense import AsyncGoogleAdSenseClient
+
+
+def parse_token_expiry(raw: Optional[str]) -> Optional[datetime]:
+    if not raw:
+        return None
+    try:
+        expiry = datetime.fromisoformat(raw)
+    except ValueError:
+        return None
+    if expiry.tzinfo is None:
+        expiry = expiry.replace(tzinfo=timezone.utc)
+    return expiry
+
+
+@dataclass(frozen=True)
+class CachedToken:
+    access_token: str
+    expiry: datetime
+    # Tokens are only reused while the stored refresh token is unchanged.
+    refresh_token: str
+
+
+class AdSenseTokenManager:
+    """Hand out AdSense access tokens, refreshing each account at most once at a time.
+
+    Decoded tokens are cached in memory per integration id and refreshed
+    ``refresh_margin`` before they expire. Concurrent callers for the same
+    integration wait on a single in-flight refresh. Refreshed tokens are kept
+    pending until :meth:`write_back` stores them all with one statement.
+    """
+
+    def __init__(self, refresh_margin: timedelta) -> None:
+        self.refresh_margin = refresh_margin
+        self._tokens: Dict[int, CachedToken] = {}
+        self._refreshing: Dict[int, asyncio.Task] = {}
+        self._pending: Dict[int, CachedToken] = {}
+
+    def _is_fresh(self, token: CachedToken) -> bool:
+        return token.expiry > datetime.now(timezone.utc) + self.refresh_margin
+
+    def _cached(self, integration_id: int, credentials: Mapping[str, Any]) -> Optional[CachedToken]:
+        token = self._tokens.get(integration_id)
+        if token is not None and token.refresh_token == credentials.get("refresh_token"):
+            return token
+
+        expiry = parse_token_expiry(credentials.get("token_expiry"))
+        if not credentials.get("access_token") or expiry is None:
+            return None
+        token = CachedToken(credentials["access_token"], expiry, credentials.get("refresh_token"))
+        self._tokens[integration_id] = token
+        return token
+
+    async def _refresh(self, integration_id: int, credentials: Mapping[str, Any]) -> CachedToken:
+        refreshed = await AsyncGoogleAdSenseClient.refresh_access_token(
+            client_id=credentials["client_id"],
+            client_secret=credentials["client_secret"],
+            refresh_token=credentials["refresh_token"],
+        )
+        token = CachedToken(
+            refreshed["access_token"],
+            parse_token_expiry(refreshed["token_expiry"]),
+            credentials["refresh_token"],
+        )
+        self._tokens[integration_id] = token
+        self._pending[integration_id] = token
+        return token
+
+    async def get_access_token(
+        self, integration: IntegrationAccount, rejected_token: Optional[str] = None
+    ) -> str:
+        """Return a usable access token for ``integration``.
+
+        Pass the token the provider just refused as ``rejected_token`` to force a
+        refresh, unless another caller has already replaced it.
+        """
+
+        credentials = integration.credentials
+        token = self._cached(integration.id, credentials)
+        if (
+            token is not None
+            and token.access_token != rejected_token
+            and self._is_fresh(token)
+        ):
+            return token.access_token
+
+        task = self._refreshing.get(integration.id)
+        if task is None:
+            task = asyncio.create_task(self._refresh(integration.id, dict(credentials)))
+            self._refreshing[integration.id] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(integration.id, None))
+        # Shielded so a cancelled caller does not abort the refresh others wait on.
+        token = await asyncio.shield(task)
+        return token.access_token
+
+    def forget(self, integration_id: int) -> None:
+        """Drop everything known about an integration whose credentials were edited or removed."""
+
+        self._tokens.pop(integration_id, None)
+        self._pending.pop(integration_id, None)
+
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    async def write_back(self, session: AsyncSession) -> List[int]:
+        """Store every pending refreshed token with one batched UPDATE.
+
+        Returns the ids of the users whose integrations changed. The caller is
+        responsible for committing; tokens lost to a failed commit stay cached in
+        memory and are simply refreshed again once they expire.
+        """
+
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return []
+
+        result = await session.execute(
+            select(
+                IntegrationAccount.id,
+                IntegrationAccount.user_id,
+                IntegrationAccount.credentials,
+            ).where(IntegrationAccount.id.in_(pending))
+        )
+        values = []
+        user_ids = []
+        for integration_id, user_id, credentials in result.all():
+            token = pending[integration_id]
+            if credentials.get("refresh_token") != token.refresh_token:
+                continue
+            values.append(
+                {
+                    "id": integration_id,
+                    "credentials": {
+                        **credentials,
+                        "access_token": token.access_token,
+                        "token_expiry": token.expiry.isoformat(),
+                    },
+                }
+            )
+            user_ids.append(user_id)
+
+        if values:
+            await session.execute(update(IntegrationAccount), values)
+        return user_ids
+
+
+@lru_cache()
+def get_token_manager() -> AdSenseTokenManager:
+    return AdSenseTokenManager(
+        timedelta(seconds=get_settings().adsense_token_refresh_margin_seconds)
+    )
@@ -3,7 +3,14 @@ from typing import Optional
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..core.passwords import (
+    burn_verification,
+    hash_password,
+    password_needs_rehash,
+    verify_password,
+)
 from ..models.user import User
+from .principals import invalidate_principals
 
 
 async def get_user(session: AsyncSession, user_id: int) -> Optional[User]:
@@ -19,7 +26,19 @@ async def get_user_by_email(session: AsyncSession, email: str) -> Optional[User]
 async def authenticate_user(
     session: AsyncSession, email: str, password: str
 ) -> Optional[User]:
+    """Return the user if ``password`` is theirs, upgrading a hash made with older settings.
+
+    Commits when the stored hash is replaced.
+    """
+
     user = await get_user_by_email(session, email)
-    if user and user.verify_password(password):
-        return user
-    return None
+    if user is None:
+        await burn_verification(password)
+        return None
+    if not await verify_password(password, user.password_hash):
+        return None
+    if password_needs_rehash(user.password_hash):
+        user.password_hash = await hash_password(password)
+        await session.commit()
+        await invalidate_principals([user.id])
+    return user
@@ -0,0 +1,125 @@
+"""Standalone sync worker, run apart from the API processes.
+
+    python -m app.worker [--processes N] [--once [YYYY-MM-DD]]
+
+Each process runs the daily scheduler; processes of the same or other
+machines share every run through the work items in the database. With
+``--once`` the sync of the given day (today by default) runs immediately and
+the worker exits when no work is left.
+"""
+
+from datetime import date
+from typing import List, Optional
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import signal
+
+from .bootstrap import prepare_database
+from .core.config import get_settings
+from .core.database import engine
+from .core.instrumentation import mark_process_stopped
+from .services.coordination import run_shared_sync
+from .services.http import close_http_clients
+from .services.scheduler import shutdown_scheduler, start_scheduler
+
+logger = logging.getLogger("app.worker")
+
+
+async def _serve() -> None:
+    scheduler = await start_scheduler()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    logger.info("Sync worker started")
+    try:
+        await stop.wait()
+    finally:
+        await shutdown_scheduler(scheduler)
+        await close_http_clients()
+        await engine.dispose()
+    logger.info("Sync worker stopped")
+
+
+async def _run_once(metric_day: date) -> None:
+    try:
+        await run_shared_sync(metric_day)
+    finally:
+        await close_http_clients()
+        await engine.dispose()
+
+
+def _process_main(once: Optional[date]) -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(processName)s %(name)s %(levelname)s %(message)s",
+    )
+    try:
+        asyncio.run(_run_once(once) if once is not None else _serve())
+    finally:
+        mark_process_stopped()
+
+
+async def _prepare() -> None:
+    await prepare_database()
+    # Connections must not outlive the event loop that opened them.
+    await engine.dispose()
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.worker", description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=get_settings().worker_processes,
+        help="number of worker processes (default: WORKER_PROCESSES)",
+    )
+    parser.add_argument(
+        "--once",
+        nargs="?",
+        const=date.today(),
+        type=date.fromisoformat,
+        metavar="YYYY-MM-DD",
+        help="sync this day (default: today) right away and exit",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    asyncio.run(_prepare())
+
+    if args.processes <= 1:
+        _process_main(args.once)
+        return
+
+    # The parent only prepared the database; its pool gauges must not be summed.
+    mark_process_stopped()
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=_process_main, args=(args.once,), name=f"sync-worker-{index}")
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def _terminate(signum: int, frame: object) -> None:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, _terminate)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Children received the same SIGINT and are shutting down.
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
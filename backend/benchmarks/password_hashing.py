@@ -0,0 +1,114 @@
+"""Login throughput of the password hashers at several cost settings.
+
+    cd backend
+    python -m benchmarks.password_hashing [--logins 200] [--concurrency 50] [--workers 2]
+
+Each setting verifies ``--logins`` passwords through ``app.core.passwords``,
+``--concurrency`` at a time, as bursts of ``/auth/login`` would. Besides the
+throughput it reports the worst event loop stall seen meanwhile, which stays
+near zero because hashing runs in the bounded executor.
+"""
+
+from typing import Dict, List, Tuple
+
+import argparse
+import asyncio
+import os
+import time
+
+from app.core import passwords
+from app.core.config import get_settings
+
+SCRYPT_SETTINGS: List[Dict[str, str]] = [
+    {"PASSWORD_HASHER": "scrypt", "PASSWORD_SCRYPT_LOG2_N": str(log2_n)}
+    for log2_n in (12, 13, 14, 15)
+]
+ARGON2_SETTINGS: List[Dict[str, str]] = [
+    {
+        "PASSWORD_HASHER": "argon2",
+        "PASSWORD_ARGON2_TIME_COST": str(time_cost),
+        "PASSWORD_ARGON2_MEMORY_KIB": str(memory_kib),
+    }
+    for time_cost, memory_kib in ((2, 19 * 1024), (3, 64 * 1024))
+]
+
+
+def _configure(environment: Dict[str, str]) -> None:
+    for name in (
+        "PASSWORD_HASHER",
+        "PASSWORD_SCRYPT_LOG2_N",
+        "PASSWORD_ARGON2_TIME_COST",
+        "PASSWORD_ARGON2_MEMORY_KIB",
+    ):
+        os.environ.pop(name, None)
+    os.environ.update(environment)
+    get_settings.cache_clear()
+    passwords.get_password_hasher.cache_clear()
+
+
+async def _watch_loop(stop: asyncio.Event, stalls: List[float]) -> None:
+    interval = 0.005
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        stalls.append(time.perf_counter() - started - interval)
+
+
+async def _measure(logins: int, concurrency: int) -> Tuple[float, float, float]:
+    encoded = await passwords.hash_password("correct horse")
+    started = time.perf_counter()
+    await passwords.verify_password("correct horse", encoded)
+    single = time.perf_counter() - started
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login() -> None:
+        async with semaphore:
+            assert await passwords.verify_password("correct horse", encoded)
+
+    stop = asyncio.Event()
+    stalls: List[float] = []
+    watcher = asyncio.create_task(_watch_loop(stop, stalls))
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await watcher
+    return single, logins / elapsed, max(stalls, default=0.0)
+
+
+def _describe(environment: Dict[str, str]) -> str:
+    return ", ".join(
+        f"{name.replace('PASSWORD_', '').lower()}={value}" for name, value in environment.items()
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=get_settings().password_hash_workers)
+    args = parser.parse_args()
+    os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+
+    settings = list(SCRYPT_SETTINGS)
+    try:
+        import argon2  # noqa: F401
+    except ImportError:
+        print("argon2-cffi is not installed; skipping argon2 settings")
+    else:
+        settings.extend(ARGON2_SETTINGS)
+
+    print(f"{args.logins} logins, {args.concurrency} concurrent, {args.workers} hashing threads")
+    print(f"{'setting':<52} {'1 login':>10} {'logins/s':>10} {'max stall':>10}")
+    for environment in settings:
+        _configure(environment)
+        single, throughput, stall = asyncio.run(_measure(args.logins, args.concurrency))
+        print(
+            f"{_describe(environment):<52} {single * 1000:>8.1f}ms {throughput:>10.1f}"
+            f" {stall * 1000:>8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
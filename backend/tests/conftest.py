@@ -0,0 +1,96 @@
+"""Shared fixtures: every test starts from empty tables in a throwaway SQLite database.
+
+The engine is created when ``app.core.database`` is imported, so the settings
+it reads are set here, before any application module is loaded.
+"""
+
+from typing import AsyncIterator, Iterator
+
+import asyncio
+import os
+import tempfile
+
+_DATA_DIR = tempfile.mkdtemp(prefix="dashboard-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_DATA_DIR, 'app.db')}"
+os.environ["SCHEDULER_ENABLED"] = "false"
+os.environ["PASSWORD_SCRYPT_LOG2_N"] = "4"
+os.environ["PROVIDER_RETRY_BASE_DELAY_SECONDS"] = "0"
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal, dispose_engines, engine
+from app.models.base import Base
+from app.services import http, metrics, principals
+from app.services.cache import get_cache
+from app.services.events import get_event_bus
+from app.services.facebook import GRAPH_HOST
+from app.services.google_adsense import ADSENSE_HOST, OAUTH_HOST
+from app.services.rate_limit import get_adsense_rate_limiter, get_facebook_rate_limiter
+from app.services.resilience import get_circuit_breaker
+from app.services.tokens import get_token_manager
+
+from support import FakeProviders
+
+_PROCESS_SINGLETONS = (
+    get_cache,
+    get_event_bus,
+    get_circuit_breaker,
+    get_token_manager,
+    get_facebook_rate_limiter,
+    get_adsense_rate_limiter,
+    principals._claims_cache,
+    principals._principal_cache,
+)
+
+
+async def _recreate_tables() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    await engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def database() -> Iterator[None]:
+    """Empty every table and forget the state a previous test left in this process."""
+
+    asyncio.run(_recreate_tables())
+    for singleton in _PROCESS_SINGLETONS:
+        singleton.cache_clear()
+    metrics._global_semaphore = None
+    http._clients.clear()
+    yield
+    asyncio.run(dispose_engines())
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture
+async def session() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as session:
+        yield session
+    await dispose_engines()
+
+
+@pytest.fixture
+def client() -> Iterator[TestClient]:
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def providers() -> FakeProviders:
+    """Answer the provider requests of this test with :class:`FakeProviders`."""
+
+    fake = FakeProviders()
+    for host in (GRAPH_HOST, ADSENSE_HOST, OAUTH_HOST):
+        http._clients[host] = httpx.AsyncClient(transport=httpx.MockTransport(fake.handle))
+    return fake
@@ -0,0 +1,107 @@
+"""Helpers shared by the tests; ``conftest`` configures the app before this is imported."""
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Set
+
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.integration import IntegrationAccount, IntegrationType
+from app.models.user import User
+from app.services.facebook import GRAPH_HOST
+from app.services.google_adsense import ADSENSE_HOST, OAUTH_HOST
+
+
+def login(client: TestClient, email: str = "ana@example.com") -> Dict[str, str]:
+    """Register ``email`` through the API and return the headers of its requests."""
+
+    client.post("/users", json={"email": email, "name": "Ana", "password": "secret1"})
+    response = client.post("/auth/login", json={"email": email, "password": "secret1"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def add_user(session: AsyncSession, email: str = "ana@example.com") -> User:
+    user = User(email=email, name="Ana", password_hash="unused")
+    session.add(user)
+    await session.commit()
+    return user
+
+
+async def add_facebook_integration(
+    session: AsyncSession, user: User, account_id: str = "1"
+) -> IntegrationAccount:
+    integration = IntegrationAccount(
+        user_id=user.id,
+        type=IntegrationType.FACEBOOK,
+        credentials={"account_id": account_id, "access_token": "token"},
+    )
+    session.add(integration)
+    await session.commit()
+    return integration
+
+
+def days(start: date, end: date) -> List[date]:
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+
+class FakeProviders:
+    """Stand-in for the Graph and AdSense APIs behind the shared HTTP clients.
+
+    Every Facebook account spends 10 and earns 15 a day and every AdSense
+    account earns 5 a day. Facebook accounts in ``failing_accounts`` answer
+    500, and ``account_usage`` is sent in the Graph API usage header.
+    """
+
+    def __init__(self) -> None:
+        self.requests: List[httpx.Request] = []
+        self.failing_accounts: Set[str] = set()
+        self.account_usage: Dict[str, Any] = {"acc_id_util_pct": 1}
+
+    def facebook_ranges(self, account_id: str) -> List[Dict[str, str]]:
+        """Return the ``time_range`` of every insights request sent for an account."""
+
+        return [
+            json.loads(request.url.params["time_range"])
+            for request in self.requests
+            if request.url.host == GRAPH_HOST
+            and request.url.path.endswith(f"/act_{account_id}/insights")
+        ]
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.url.host == GRAPH_HOST:
+            account_id = request.url.path.split("/")[2].removeprefix("act_")
+            if account_id in self.failing_accounts:
+                return httpx.Response(500, json={})
+            time_range = json.loads(request.url.params["time_range"])
+            data = [
+                {
+                    "date_start": day.isoformat(),
+                    "spend": "10",
+                    "actions": [{"action_type": "offsite_conversion", "value": "15"}],
+                }
+                for day in days(
+                    date.fromisoformat(time_range["since"]), date.fromisoformat(time_range["until"])
+                )
+            ]
+            return httpx.Response(
+                200,
+                json={"data": data},
+                headers={"x-ad-account-usage": json.dumps(self.account_usage)},
+            )
+        if request.url.host == OAUTH_HOST:
+            return httpx.Response(200, json={"access_token": "fresh", "expires_in": 3600})
+        if request.url.host == ADSENSE_HOST:
+            date_range = json.loads(request.content)["dateRange"]
+            rows = [
+                {"cells": [{"value": day.isoformat()}, {"value": "5"}]}
+                for day in days(
+                    date.fromisoformat(date_range["startDate"]),
+                    date.fromisoformat(date_range["endDate"]),
+                )
+            ]
+            return httpx.Response(200, json={"rows": rows})
+        return httpx.Response(404)
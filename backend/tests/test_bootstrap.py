@@ -0,0 +1,54 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import inspect, select, text
+
+from app.bootstrap import prepare_database
+from app.core.database import engine
+from app.models.metrics import DailyMetric, MetricGranularity, MetricRollup
+
+from support import add_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_upgrade_from_duplicate_daily_rows_keeps_the_newest(session):
+    # The schema as it was before daily_metrics had a unique key.
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP INDEX uq_daily_metrics_user_date"))
+    user = await add_user(session)
+    session.add_all(
+        [
+            DailyMetric(user_id=user.id, metric_date=date(2026, 10, 5), spend=1, revenue=1, roi=0),
+            DailyMetric(user_id=user.id, metric_date=date(2026, 10, 5), spend=2, revenue=4, roi=1),
+            DailyMetric(user_id=user.id, metric_date=date(2026, 10, 6), spend=3, revenue=3, roi=0),
+        ]
+    )
+    await session.commit()
+
+    await prepare_database()
+
+    rows = await session.execute(
+        select(DailyMetric.metric_date, DailyMetric.spend).order_by(DailyMetric.metric_date)
+    )
+    assert rows.all() == [(date(2026, 10, 5), 2), (date(2026, 10, 6), 3)]
+    async with engine.connect() as conn:
+        indexes = await conn.run_sync(lambda sync: inspect(sync).get_indexes("daily_metrics"))
+    assert any(index["name"] == "uq_daily_metrics_user_date" for index in indexes)
+    month = await session.scalar(
+        select(MetricRollup).where(MetricRollup.granularity == MetricGranularity.MONTH)
+    )
+    assert (month.spend, month.revenue, month.day_count) == (5, 7, 2)
+
+
+async def test_prepare_database_keeps_rows_once_the_index_exists(session):
+    user = await add_user(session)
+    session.add(
+        DailyMetric(user_id=user.id, metric_date=date(2026, 10, 5), spend=1, revenue=1, roi=0)
+    )
+    await session.commit()
+
+    await prepare_database()
+    await prepare_database()
+
+    assert await session.scalar(select(DailyMetric.spend)) == 1
@@ -0,0 +1,34 @@
+import pytest
+
+from app.services.cache import CacheBackend, MemoryCacheBackend
+from app.services.events import EventBus
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_memory_backend_evicts_the_least_recently_used_entry():
+    cache = MemoryCacheBackend(max_entries=2)
+    await cache.set("a", b"1", 60)
+    await cache.set("b", b"2", 60)
+    await cache.get("a")
+    await cache.set("c", b"3", 60)
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == b"1"
+    assert cache.stats() == {"hits": 2, "misses": 1, "evictions": 1, "entries": 2}
+
+
+async def test_memory_backend_versions_are_never_evicted():
+    cache = MemoryCacheBackend(max_entries=1)
+    version = await cache.bump_version("version:metrics:1")
+    await cache.set("a", b"1", 60)
+    await cache.set("b", b"2", 60)
+
+    assert await cache.get_version("version:metrics:1") == version
+
+
+def test_interfaces_cannot_be_instantiated():
+    with pytest.raises(TypeError):
+        CacheBackend()
+    with pytest.raises(TypeError):
+        EventBus()
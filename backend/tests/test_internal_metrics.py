@@ -0,0 +1,26 @@
+import pytest
+
+from app.core.config import get_settings
+
+
+@pytest.fixture
+def token(monkeypatch):
+    monkeypatch.setattr(get_settings(), "internal_metrics_token", "scrape-me")
+    return "scrape-me"
+
+
+def test_internal_metrics_are_off_by_default(client):
+    assert client.get("/metrics-internal").status_code == 404
+
+
+def test_internal_metrics_require_the_token(client, token):
+    assert client.get("/metrics-internal").status_code == 401
+    assert (
+        client.get("/metrics-internal", headers={"Authorization": "Bearer wrong"}).status_code
+        == 401
+    )
+
+    response = client.get("/metrics-internal", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    assert "http_request_duration_seconds" in response.text
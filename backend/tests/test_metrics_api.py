@@ -0,0 +1,77 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.services.cache import get_cache
+
+from support import login
+
+PARAMS = {"start_date": "2026-10-01", "end_date": "2026-10-03"}
+
+
+def _seed(client: TestClient, headers) -> None:
+    client.post(
+        "/integrations/facebook", json={"account_id": "1", "access_token": "x"}, headers=headers
+    )
+    client.post(
+        "/metrics/backfill", params={"start": "2026-10-01", "end": "2026-10-03"}, headers=headers
+    )
+
+
+def test_workers_hand_out_the_same_etag_for_the_same_data(providers):
+    with TestClient(create_app()) as first:
+        headers = login(first)
+        _seed(first, headers)
+        etag = first.get("/metrics", params=PARAMS, headers=headers).headers["etag"]
+
+    # Another worker, or this one after a restart, starts with its own memory cache.
+    get_cache.cache_clear()
+    with TestClient(create_app()) as second:
+        fresh = second.get("/metrics", params=PARAMS, headers=headers)
+        revalidated = second.get(
+            "/metrics", params=PARAMS, headers={**headers, "If-None-Match": etag}
+        )
+
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] == etag
+    assert revalidated.status_code == 304
+
+
+def test_etag_changes_when_the_metrics_are_rewritten(client, providers):
+    headers = login(client)
+    _seed(client, headers)
+    etag = client.get("/metrics", params=PARAMS, headers=headers).headers["etag"]
+
+    client.post(
+        "/metrics/backfill",
+        params={"start": "2026-10-02", "end": "2026-10-02", "force": True},
+        headers=headers,
+    )
+    response = client.get("/metrics", params=PARAMS, headers={**headers, "If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["total_revenue"] == 45
+
+
+@pytest.mark.parametrize("granularity", ["day", "week", "month"])
+def test_totals_cover_the_requested_days_at_every_granularity(client, providers, granularity):
+    headers = login(client)
+    client.post(
+        "/integrations/facebook", json={"account_id": "1", "access_token": "x"}, headers=headers
+    )
+    client.post(
+        "/metrics/backfill", params={"start": "2026-10-01", "end": "2026-10-31"}, headers=headers
+    )
+
+    body = client.get(
+        "/metrics",
+        params={"start_date": "2026-10-16", "end_date": "2026-10-18", "granularity": granularity},
+        headers=headers,
+    ).json()
+
+    assert (body["total_spend"], body["total_revenue"]) == (30, 45)
+    assert body["weighted_roi"] == 0.5
+    if granularity == "week":
+        # 2026-10-16..18 falls in the week of Monday 2026-10-12, whose row is whole.
+        assert [(row["metric_date"], row["revenue"]) for row in body["metrics"]] == [("2026-10-12", 105)]
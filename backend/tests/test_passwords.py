@@ -0,0 +1,29 @@
+import hashlib
+
+import pytest
+
+from app.core.passwords import LegacySha256Verifier, PasswordHasher, verify_password
+from app.models.user import User
+from app.services.users import authenticate_user
+
+pytestmark = pytest.mark.anyio
+
+LEGACY_HASH = hashlib.sha256(b"secret1").hexdigest()
+
+
+async def test_legacy_hashes_verify_but_are_never_produced():
+    assert await verify_password("secret1", LEGACY_HASH)
+    assert not await verify_password("wrong", LEGACY_HASH)
+    assert not isinstance(LegacySha256Verifier(), PasswordHasher)
+
+
+async def test_login_replaces_a_legacy_hash(session):
+    user = User(email="ana@example.com", name="Ana", password_hash=LEGACY_HASH)
+    session.add(user)
+    await session.commit()
+
+    assert await authenticate_user(session, "ana@example.com", "secret1") is not None
+
+    await session.refresh(user)
+    assert user.password_hash.startswith("$scrypt$")
+    assert await verify_password("secret1", user.password_hash)
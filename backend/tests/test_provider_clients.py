@@ -0,0 +1,60 @@
+from datetime import date
+
+import httpx
+import pytest
+
+from app.services.facebook import AsyncFacebookAdsClient
+from app.services.google_adsense import AdSenseUnauthorizedError, AsyncGoogleAdSenseClient
+from app.services.rate_limit import FixedRateLimiter
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_facebook_client_follows_insights_pages():
+    pages = {
+        "first": {
+            "data": [{"date_start": "2026-10-01", "spend": "4"}],
+            "paging": {"next": "https://graph.facebook.com/v18.0/next-page"},
+        },
+        "next": {
+            "data": [
+                {
+                    "date_start": "2026-10-02",
+                    "spend": "6",
+                    "actions": [{"action_type": "offsite_conversion.purchase", "value": "9"}],
+                }
+            ]
+        },
+    }
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        page = "next" if request.url.path.endswith("next-page") else "first"
+        return httpx.Response(200, json=pages[page])
+
+    client = AsyncFacebookAdsClient(
+        "token", "1", http_client=httpx.AsyncClient(transport=httpx.MockTransport(handle))
+    )
+
+    assert await client.fetch_metrics_range(date(2026, 10, 1), date(2026, 10, 2)) == {
+        date(2026, 10, 1): {"spend": 4.0, "revenue": 0.0},
+        date(2026, 10, 2): {"spend": 6.0, "revenue": 9.0},
+    }
+
+
+async def test_adsense_client_reports_rejected_tokens():
+    client = AsyncGoogleAdSenseClient(
+        "accounts/pub-1",
+        "expired",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(lambda _: httpx.Response(401))),
+        rate_limiter=FixedRateLimiter(600, 60),
+    )
+
+    with pytest.raises(AdSenseUnauthorizedError):
+        await client.fetch_daily_earnings(date(2026, 10, 1))
+
+
+async def test_adsense_token_refresh_goes_through_the_shared_pool(providers):
+    token = await AsyncGoogleAdSenseClient.refresh_access_token("id", "secret", "refresh")
+
+    assert token["access_token"] == "fresh"
+    assert [request.url.host for request in providers.requests] == ["oauth2.googleapis.com"]
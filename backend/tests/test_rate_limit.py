@@ -0,0 +1,47 @@
+from datetime import date
+
+import time
+
+import pytest
+
+from app.services.metrics import fetch_integration_metrics
+from app.services.rate_limit import ProviderThrottledError, TokenBucket
+
+from support import add_facebook_integration, add_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_bucket_fails_instead_of_waiting_out_a_long_pause():
+    bucket = TokenBucket(rate=10)
+    bucket.pause(600)
+
+    started = time.monotonic()
+    with pytest.raises(ProviderThrottledError) as raised:
+        await bucket.acquire(max_wait=1)
+
+    assert time.monotonic() - started < 1
+    assert raised.value.retry_in_seconds > 500
+
+
+async def test_bucket_waits_out_a_pause_within_the_limit():
+    bucket = TokenBucket(rate=10)
+    bucket.pause(0.05)
+
+    await bucket.acquire(max_wait=1)
+
+
+async def test_paused_account_fails_fast_without_holding_the_sync(session, providers):
+    user = await add_user(session)
+    integration = await add_facebook_integration(session, user)
+    providers.account_usage = {"acc_id_util_pct": 100, "reset_time_duration": 600}
+    plan = {integration.id: [(date(2026, 10, 1), date(2026, 10, 1))]}
+
+    first = await fetch_integration_metrics([integration], plan)
+    started = time.monotonic()
+    second = await fetch_integration_metrics([integration], plan)
+
+    assert not first.failures
+    assert isinstance(second.failures[integration.id], ProviderThrottledError)
+    assert time.monotonic() - started < 1
+    assert len(providers.facebook_ranges("1")) == 1
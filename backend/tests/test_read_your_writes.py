@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.api import deps
+from app.core.config import get_settings
+from app.core.database import create_database_engine
+from app.models.base import Base
+from app.services.cache import (
+    MemoryCacheBackend,
+    get_cache,
+    record_user_writes,
+    wrote_recently,
+)
+
+from support import login
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    monkeypatch.setattr(get_settings(), "database_read_url", "sqlite+aiosqlite:///replica.db")
+
+
+async def test_recent_writer_is_kept_on_the_primary(replica):
+    await record_user_writes([1])
+
+    assert await wrote_recently(1)
+    assert not await wrote_recently(2)
+
+
+async def test_markers_stay_out_of_the_response_cache(replica):
+    await record_user_writes([1, 2])
+    await wrote_recently(1)
+    await wrote_recently(3)
+
+    assert get_cache().stats() == {"hits": 0, "misses": 0, "evictions": 0, "entries": 0}
+
+
+async def test_markers_survive_response_cache_evictions():
+    cache = MemoryCacheBackend(max_entries=1)
+    await cache.set_marker("recent-write:1", 60)
+    await cache.set("metrics:a", b"a", 60)
+    await cache.set("metrics:b", b"b", 60)
+
+    assert await cache.has_marker("recent-write:1")
+    assert await cache.get("metrics:a") is None
+
+
+async def test_writes_are_not_tracked_without_a_replica():
+    await record_user_writes([1])
+
+    assert not await wrote_recently(1)
+
+
+@pytest.fixture
+def replica_database(monkeypatch, tmp_path):
+    """Send the API's replica reads to a separate, empty SQLite database."""
+
+    replica_engine = create_database_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}")
+    sessions = sessionmaker(bind=replica_engine, expire_on_commit=False, class_=AsyncSession)
+
+    async def create_tables():
+        async with replica_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await replica_engine.dispose()
+
+    async def get_replica_session():
+        async with sessions() as session:
+            yield session
+
+    asyncio.run(create_tables())
+    settings = get_settings()
+    monkeypatch.setattr(settings, "database_read_url", str(replica_engine.url))
+    monkeypatch.setattr(settings, "read_your_writes_seconds", 0.3)
+    monkeypatch.setattr(deps, "read_engine", replica_engine)
+    monkeypatch.setattr(deps, "get_read_session", get_replica_session)
+    yield
+    asyncio.run(replica_engine.dispose())
+
+
+def test_reads_follow_the_users_writes_then_return_to_the_replica(client, replica_database):
+    headers = login(client)
+    client.post(
+        "/integrations/facebook", json={"account_id": "1", "access_token": "x"}, headers=headers
+    )
+
+    # Only the primary has the integration; the replica never replays it here.
+    assert len(client.get("/integrations", headers=headers).json()) == 1
+    time.sleep(0.4)
+    assert client.get("/integrations", headers=headers).json() == []
@@ -0,0 +1,44 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.models.integration import IntegrationSyncState
+from app.models.metrics import DailyMetric
+from app.services.sync_engine import SyncEngine
+
+from support import add_facebook_integration, add_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_nightly_sync_settles_the_day_leaving_the_attribution_window(session, providers):
+    today = date.today()
+    user = await add_user(session)
+    integration = await add_facebook_integration(session, user)
+
+    stats = await SyncEngine().run(today)
+
+    # Facebook's 7-day window is the longest, so the run reaches 8 days back.
+    assert stats.users_synced == 1
+    assert providers.facebook_ranges("1") == [
+        {"since": (today - timedelta(days=8)).isoformat(), "until": today.isoformat()}
+    ]
+    state = await session.get(IntegrationSyncState, integration.id)
+    assert state.settled_through == today - timedelta(days=8)
+    totals = await session.execute(select(DailyMetric.metric_date, DailyMetric.revenue))
+    assert len(totals.all()) == 9
+
+
+async def test_next_nightly_sync_skips_the_settled_day(session, providers):
+    today = date.today()
+    user = await add_user(session)
+    await add_facebook_integration(session, user)
+
+    await SyncEngine().run(today - timedelta(days=1))
+    await SyncEngine().run(today)
+
+    assert providers.facebook_ranges("1")[-1] == {
+        "since": (today - timedelta(days=7)).isoformat(),
+        "until": today.isoformat(),
+    }
@@ -0,0 +1,104 @@
+from datetime import date, datetime, timedelta
+
+import asyncio
+
+import pytest
+from sqlalchemy import update
+
+from app.models.scheduling import SyncJob, SyncJobStatus
+from app.services.sync_jobs import JobClaimHeartbeat, SyncJobRunner, enqueue_sync_job
+
+from support import add_facebook_integration, add_user
+
+pytestmark = pytest.mark.anyio
+
+DAY = date(2026, 10, 1)
+
+
+async def _job_status(session, job_id):
+    job = await session.get(SyncJob, job_id, populate_existing=True)
+    return job.status, job.claimed_by
+
+
+async def _expire_claim(session, job_id):
+    await session.execute(
+        update(SyncJob)
+        .where(SyncJob.id == job_id)
+        .values(claimed_until=datetime.utcnow() - timedelta(seconds=1))
+    )
+    await session.commit()
+
+
+async def test_job_fails_when_every_planned_integration_fails(session, providers):
+    user = await add_user(session)
+    await add_facebook_integration(session, user, "1")
+    settled, _ = await enqueue_sync_job(session, user.id, DAY, DAY)
+    await SyncJobRunner().run(settled.id)
+    await add_facebook_integration(session, user, "2")
+    providers.failing_accounts.add("2")
+
+    # Account 1 already has the day, long settled, so only account 2 is planned.
+    job, _ = await enqueue_sync_job(session, user.id, DAY, DAY)
+    await SyncJobRunner().run(job.id)
+
+    status, _ = await _job_status(session, job.id)
+    assert status == SyncJobStatus.FAILED
+
+
+async def test_job_is_partial_when_some_integrations_fail(session, providers):
+    user = await add_user(session)
+    await add_facebook_integration(session, user, "1")
+    await add_facebook_integration(session, user, "2")
+    providers.failing_accounts.add("2")
+
+    job, _ = await enqueue_sync_job(session, user.id, DAY, DAY)
+    await SyncJobRunner().run(job.id)
+
+    status, _ = await _job_status(session, job.id)
+    assert status == SyncJobStatus.PARTIAL
+
+
+async def test_running_job_keeps_its_claim(session):
+    user = await add_user(session)
+    job, _ = await enqueue_sync_job(session, user.id, DAY, DAY)
+    runner = SyncJobRunner(holder="a")
+    runner.claim_ttl = timedelta(seconds=0.3)
+    [claim] = await runner._claim(job.id)
+
+    async with JobClaimHeartbeat(runner.session_factory, claim, "a", runner.claim_ttl) as beat:
+        await asyncio.sleep(0.6)
+        taken = await SyncJobRunner(holder="b")._claim(job.id)
+
+    assert taken == []
+    assert not beat.lost
+    assert await _job_status(session, job.id) == (SyncJobStatus.RUNNING, "a")
+
+
+async def test_heartbeat_notices_the_job_was_claimed_again(session):
+    user = await add_user(session)
+    job, _ = await enqueue_sync_job(session, user.id, DAY, DAY)
+    [claim] = await SyncJobRunner(holder="a")._claim(job.id)
+    await _expire_claim(session, job.id)
+    await SyncJobRunner(holder="b")._claim(job.id)
+
+    beat = JobClaimHeartbeat(SyncJobRunner().session_factory, claim, "a", timedelta(seconds=60))
+    async with beat.session_factory() as renew_session:
+        assert not await beat.renew(renew_session)
+
+
+@pytest.mark.parametrize("second_holder", ["a", "b"])
+async def test_stale_runner_cannot_finish_the_job(session, second_holder):
+    user = await add_user(session)
+    job, _ = await enqueue_sync_job(session, user.id, DAY, DAY)
+    stale = SyncJobRunner(holder="a")
+    [stale_claim] = await stale._claim(job.id)
+    await _expire_claim(session, job.id)
+    current = SyncJobRunner(holder=second_holder)
+    [current_claim] = await current._claim(job.id)
+
+    await stale._finish(session, stale_claim, SyncJobStatus.FAILED, "interrupted")
+    assert await _job_status(session, job.id) == (SyncJobStatus.RUNNING, second_holder)
+
+    await current._finish(session, current_claim, SyncJobStatus.SUCCEEDED, None)
+    status, _ = await _job_status(session, job.id)
+    assert status == SyncJobStatus.SUCCEEDED
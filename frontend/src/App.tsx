@@ -1,4 +1,4 @@
-import { FormEvent, useCallback, useEffect, useMemo, useState } from 'react'
+import { FormEvent, useCallback, useEffect, useMemo, useRef, useState } from 'react'
 import { differenceInCalendarDays, format, parseISO } from 'date-fns'
 import { MetricsChart } from './components/MetricsChart'
 import { MetricsSummary } from './components/MetricsSummary'
@@ -13,6 +13,8 @@ import {
   deleteIntegration,
   listNotifications,
   markNotificationRead,
+  openEventStream,
+  MetricsGranularity,
 } from './services/api'
 import { User } from './types/user'
 import { Integration } from './types/integration'
@@ -38,10 +40,12 @@ export default function App() {
   const [notificationError, setNotificationError] = useState('')
   const [startDate, setStartDate] = useState<string>(DEFAULT_RANGE.start)
   const [endDate, setEndDate] = useState<string>(DEFAULT_RANGE.end)
+  const [granularity, setGranularity] = useState<MetricsGranularity>('day')
 
   const { data, isLoading, error, refetch } = useMetrics({
     startDate,
     endDate,
+    granularity,
     enabled: !!token,
   })
 
@@ -49,6 +53,12 @@ export default function App() {
     refetch()
   }, [refetch])
 
+  // Read by the event stream so changing the date range does not reconnect it.
+  const refetchRef = useRef(refetch)
+  useEffect(() => {
+    refetchRef.current = refetch
+  }, [refetch])
+
   const handleLogin = useCallback(
     async (event: FormEvent<HTMLFormElement>) => {
       event.preventDefault()
@@ -170,12 +180,27 @@ export default function App() {
     void loadIntegrations()
     void loadNotifications()
 
-    const intervalId = window.setInterval(() => {
-      void loadNotifications()
-    }, 60_000)
+    const source = openEventStream(token)
+    let hasConnected = false
+    source.onopen = () => {
+      // Notifications sent while the stream was reconnecting are reloaded.
+      if (hasConnected) {
+        void loadNotifications()
+      }
+      hasConnected = true
+    }
+    source.addEventListener('notification', (event) => {
+      const notification = JSON.parse((event as MessageEvent<string>).data) as SyncNotification
+      setNotifications((current) =>
+        current.some((item) => item.id === notification.id) ? current : [notification, ...current]
+      )
+    })
+    source.addEventListener('metrics', () => {
+      void refetchRef.current()
+    })
 
     return () => {
-      window.clearInterval(intervalId)
+      source.close()
     }
   }, [token, loadIntegrations, loadNotifications])
 
@@ -395,6 +420,18 @@ export default function App() {
                   onChange={(event) => setEndDate(event.target.value)}
                 />
               </div>
+              <div>
+                <label htmlFor="granularity">Agrupar por</label>
+                <select
+                  id="granularity"
+                  value={granularity}
+                  onChange={(event) => setGranularity(event.target.value as MetricsGranularity)}
+                >
+                  <option value="day">Dia</option>
+                  <option value="week">Semana</option>
+                  <option value="month">Mês</option>
+                </select>
+              </div>
               <button className="primary" onClick={onRefresh} disabled={isLoading}>
                 Atualizar
               </button>
@@ -412,7 +449,7 @@ export default function App() {
           </section>
 
           <section className="panel full-width">
-            <h2>ROI diário</h2>
+            <h2>{granularity === 'day' ? 'ROI diário' : granularity === 'week' ? 'ROI semanal' : 'ROI mensal'}</h2>
             <MetricsChart metrics={data?.metrics ?? []} isLoading={isLoading} />
           </section>
         </main>
@@ -1,13 +1,19 @@
 import { useEffect, useState, useCallback } from 'react'
-import { fetchMetrics, MetricsResponse } from '../services/api'
+import { fetchMetrics, MetricsGranularity, MetricsResponse } from '../services/api'
 
 export type UseMetricsParams = {
   startDate: string
   endDate: string
+  granularity?: MetricsGranularity
   enabled?: boolean
 }
 
-export function useMetrics({ startDate, endDate, enabled = true }: UseMetricsParams) {
+export function useMetrics({
+  startDate,
+  endDate,
+  granularity = 'day',
+  enabled = true,
+}: UseMetricsParams) {
   const [data, setData] = useState<MetricsResponse | null>(null)
   const [isLoading, setIsLoading] = useState<boolean>(false)
   const [error, setError] = useState<string>('')
@@ -19,7 +25,7 @@ export function useMetrics({ startDate, endDate, enabled = true }: UseMetricsPar
     setIsLoading(true)
     setError('')
     try {
-      const result = await fetchMetrics({ startDate, endDate })
+      const result = await fetchMetrics({ startDate, endDate, granularity })
       setData(result)
     } catch (err) {
       console.error(err)
@@ -27,7 +33,7 @@ export function useMetrics({ startDate, endDate, enabled = true }: UseMetricsPar
     } finally {
       setIsLoading(false)
     }
-  }, [enabled, startDate, endDate])
+  }, [enabled, startDate, endDate, granularity])
 
   useEffect(() => {
     if (enabled) {
@@ -4,8 +4,10 @@ import { User } from '../types/user'
 import { Integration } from '../types/integration'
 import { SyncNotification } from '../types/notification'
 
+const API_URL = import.meta.env.VITE_API_URL ?? 'http://localhost:8000'
+
 const api = axios.create({
-  baseURL: import.meta.env.VITE_API_URL ?? 'http://localhost:8000',
+  baseURL: API_URL,
 })
 
 export function setAuthToken(token: string | null) {
@@ -16,6 +18,8 @@ export function setAuthToken(token: string | null) {
   }
 }
 
+export type MetricsGranularity = 'day' | 'week' | 'month'
+
 export type MetricsResponse = {
   metrics: ChartMetric[]
   totalSpend: number
@@ -61,14 +65,17 @@ export async function registerUser(payload: { name: string; email: string; passw
 export async function fetchMetrics({
   startDate,
   endDate,
+  granularity = 'day',
 }: {
   startDate: string
   endDate: string
+  granularity?: MetricsGranularity
 }): Promise<MetricsResponse> {
   const response = await api.get('/metrics', {
     params: {
       start_date: startDate,
       end_date: endDate,
+      granularity,
     },
   })
 
@@ -166,3 +173,10 @@ export async function listNotifications(): Promise<SyncNotification[]> {
 export async function markNotificationRead(notificationId: number) {
   await api.post(`/notifications/${notificationId}/read`)
 }
+
+// EventSource cannot send the Authorization header, so the token goes in the query string.
+export function openEventStream(token: string): EventSource {
+  const url = new URL('/events', API_URL)
+  url.searchParams.set('access_token', token)
+  return new EventSource(url.toString())
+}